@@ -0,0 +1,58 @@
+"""
+Compare two loadtest.py result files run by run.
+
+Usage:
+
+    python benchmarks/compare.py benchmarks/results/OLD.json benchmarks/results/NEW.json
+"""
+import argparse
+import json
+from pathlib import Path
+
+METRICS = ("requests_per_second", "p50_ms", "p95_ms", "p99_ms")
+
+
+def run_key(run):
+    return run["worker_class"], run["workers"], run["threads"]
+
+
+def change(old, new):
+    if old is None or new is None:
+        return "n/a"
+    if not old:
+        return f"{new}"
+    return f"{old} -> {new} ({(new - old) / old * 100:+.1f}%)"
+
+
+def compare(old_report, new_report):
+    old_runs = {run_key(run): run for run in old_report["runs"]}
+    lines = [f"{old_report.get('git_commit')} -> {new_report.get('git_commit')}"]
+    for run in new_report["runs"]:
+        key = run_key(run)
+        old_run = old_runs.get(key)
+        label = f"{key[0]} x{key[1]}" + (f" ({key[2]} threads)" if key[2] > 1 else "")
+        if old_run is None:
+            lines.append(f"{label}: not in the old report")
+            continue
+        lines.append(label)
+        for scenario in ["overall", *sorted(run["scenarios"])]:
+            new_stats = run["overall"] if scenario == "overall" else run["scenarios"][scenario]
+            old_stats = (
+                old_run["overall"] if scenario == "overall" else old_run["scenarios"].get(scenario, {})
+            )
+            cells = ", ".join(
+                f"{metric} {change(old_stats.get(metric), new_stats.get(metric))}" for metric in METRICS
+            )
+            lines.append(f"  {scenario}: {cells}")
+        lines.append(
+            f"  memory: total RSS {change(old_run['memory']['total_rss_mb'], run['memory']['total_rss_mb'])} MB"
+        )
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare two load test result files.")
+    parser.add_argument("old", type=Path)
+    parser.add_argument("new", type=Path)
+    args = parser.parse_args()
+    print(compare(json.loads(args.old.read_text()), json.loads(args.new.read_text())))
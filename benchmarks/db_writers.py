@@ -0,0 +1,168 @@
+"""
+Concurrent-writer benchmark for the SQLite profile.
+
+Starts several worker processes against a fresh SQLite file, as gunicorn
+workers would, and has each of them replay a mix of generations (a Past row
+plus a session save) and history page reads for a fixed time. This runs once
+with SQLite's defaults (JD_SQLITE_TUNING=False) and once with the pragmas from
+settings.JD_SQLITE_PRAGMAS. For each profile it reports operations/sec,
+p50/p95/p99 latency and how many operations failed with "database is locked".
+The results are written to benchmarks/results/db-<time>.json.
+
+Usage (from the repository root):
+
+    python benchmarks/db_writers.py --processes 8 --duration 15 --write-ratio 0.5
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+RESULTS_DIR = ROOT / "benchmarks" / "results"
+PROFILES = {"default": "False", "tuned": "True"}
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def profile_env(db_path, tuning):
+    return {
+        **os.environ,
+        "DJANGO_SETTINGS_MODULE": "benchmarks.settings",
+        "JD_BENCH_DB": str(db_path),
+        "JD_SQLITE_TUNING": tuning,
+        "PYTHONPATH": str(ROOT),
+    }
+
+
+def worker(index, start_at, duration, write_ratio):
+    """
+    Runs in a child process; prints one JSON line with its counters.
+    """
+    sys.path.insert(0, str(ROOT))
+    import django
+
+    django.setup()
+
+    from django.contrib.auth.models import User
+    from django.contrib.sessions.backends.db import SessionStore
+    from django.db import OperationalError, close_old_connections
+
+    from chatbot.models import Past
+
+    rng = random.Random(index)
+    user = User.objects.get(username=f"bench{index}")
+    latencies = {"write": [], "read": []}
+    locked = 0
+
+    while time.time() < start_at:
+        time.sleep(0.001)
+    end = start_at + duration
+
+    while time.time() < end:
+        kind = "write" if rng.random() < write_ratio else "read"
+        started = time.perf_counter()
+        try:
+            if kind == "write":
+                Past.objects.create(
+                    user=user,
+                    question=f"Company: Bench\nJob Title: Engineer {rng.randint(1, 10**6)}",
+                    answer="**Engineer**\n- Build things\n" * 20,
+                )
+                session = SessionStore()
+                session["last_generation"] = {"job_title": "Engineer", "past_id": 1}
+                session.save()
+            else:
+                list(Past.objects.filter(user=user).defer("answer")[:5])
+        except OperationalError:
+            locked += 1
+            close_old_connections()
+            continue
+        latencies[kind].append(time.perf_counter() - started)
+
+    print(json.dumps({"latencies": latencies, "locked": locked}))
+
+
+def run_profile(name, tuning, args):
+    with tempfile.TemporaryDirectory() as tmp:
+        env = profile_env(Path(tmp) / "writers.sqlite3", tuning)
+        subprocess.run(
+            [sys.executable, "manage.py", "migrate", "-v", "0"], cwd=ROOT, env=env, check=True
+        )
+        subprocess.run(
+            [sys.executable, "manage.py", "shell", "-c",
+             "from django.contrib.auth.models import User\n"
+             f"for i in range({args.processes}): User.objects.create_user(f'bench{{i}}')"],
+            cwd=ROOT, env=env, check=True, stdout=subprocess.DEVNULL,
+        )
+
+        start_at = time.time() + 3
+        children = [
+            subprocess.Popen(
+                [sys.executable, __file__, "--worker", str(i), str(start_at),
+                 str(args.duration), str(args.write_ratio)],
+                cwd=ROOT, env=env, stdout=subprocess.PIPE, text=True,
+            )
+            for i in range(args.processes)
+        ]
+        reports = [json.loads(child.communicate()[0].strip().splitlines()[-1]) for child in children]
+
+    result = {"locked": sum(r["locked"] for r in reports)}
+    total = 0
+    for kind in ("write", "read"):
+        values = [v for r in reports for v in r["latencies"][kind]]
+        total += len(values)
+        result[kind] = {
+            "count": len(values),
+            "per_sec": round(len(values) / args.duration, 1),
+            "p50_ms": round(percentile(values, 0.50) * 1000, 2) if values else None,
+            "p95_ms": round(percentile(values, 0.95) * 1000, 2) if values else None,
+            "p99_ms": round(percentile(values, 0.99) * 1000, 2) if values else None,
+        }
+    result["ops_per_sec"] = round(total / args.duration, 1)
+    print(f"{name:>8}: {result['ops_per_sec']} ops/s, "
+          f"write p95 {result['write']['p95_ms']} ms, {result['locked']} locked", flush=True)
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark concurrent SQLite writers.")
+    parser.add_argument("--processes", type=int, default=8, help="Concurrent worker processes")
+    parser.add_argument("--duration", type=float, default=15, help="Seconds per profile")
+    parser.add_argument("--write-ratio", type=float, default=0.5,
+                        help="Share of operations that write (the rest read history)")
+    parser.add_argument("--profile", nargs="+", choices=PROFILES, default=list(PROFILES))
+    args = parser.parse_args(argv)
+
+    report = {
+        "started": datetime.now(timezone.utc).isoformat(),
+        "processes": args.processes,
+        "duration": args.duration,
+        "write_ratio": args.write_ratio,
+        "profiles": {name: run_profile(name, PROFILES[name], args) for name in args.profile},
+    }
+
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    path = RESULTS_DIR / f"db-{datetime.now():%Y%m%d-%H%M%S}.json"
+    path.write_text(json.dumps(report, indent=2))
+    print(f"Saved {path}")
+    return report
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--worker":
+        index, start_at, duration, write_ratio = sys.argv[2:6]
+        worker(int(index), float(start_at), float(duration), float(write_ratio))
+    else:
+        main()
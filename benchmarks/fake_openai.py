@@ -0,0 +1,185 @@
+"""
+Local stand-in for the OpenAI chat completions API, for load tests.
+
+Answers POST /v1/chat/completions with a canned job description after a
+configurable delay, streams it as SSE chunks when "stream" is set, and can
+fail a share of the requests. Point the app at it with
+
+    OPENAI_BASE_URL=http://127.0.0.1:8900/v1 OPENAI_API_KEY=fake
+
+Usage:
+
+    python benchmarks/fake_openai.py --port 8900 --latency 1.5 --jitter 0.5 \\
+        --error-rate 0.02 --error-status 503
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ANSWER = """**Senior Software Engineer**
+
+Responsibilities:
+- Design, build and operate services used by thousands of customers
+- Review code and mentor other engineers
+- Work with product and design on the roadmap
+
+Requirements:
+- Several years of professional software development
+- Strong knowledge of the listed technologies
+- Clear written and spoken communication
+
+Nice to Have:
+- Experience running systems in the cloud
+
+We offer a hybrid setup with flexible hours and a friendly, curious team.
+"""
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    config = None  # set by serve()
+    requests_seen = 0
+    _lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.rstrip("/") == "/stats":
+            self._send_json(200, {"requests": FakeOpenAIHandler.requests_seen})
+        else:
+            self._send_json(404, {"error": {"message": "Not found"}})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        request = json.loads(self.rfile.read(length) or b"{}")
+        if not self.path.endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": "Not found"}})
+            return
+
+        with FakeOpenAIHandler._lock:
+            FakeOpenAIHandler.requests_seen += 1
+
+        config = self.config
+        delay = max(0.0, random.gauss(config.latency, config.jitter)) if config.jitter else config.latency
+
+        if random.random() < config.error_rate:
+            time.sleep(delay)
+            self._send_json(
+                config.error_status,
+                {"error": {"message": "Injected failure", "type": "server_error"}},
+            )
+            return
+
+        model = request.get("model", "gpt-3.5-turbo")
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        words = ANSWER.split(" ")
+        usage = {
+            "prompt_tokens": 250,
+            "completion_tokens": len(words),
+            "total_tokens": 250 + len(words),
+        }
+
+        if request.get("stream"):
+            self._stream(completion_id, model, words, delay, usage, request)
+            return
+
+        time.sleep(delay)
+        self._send_json(200, {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": ANSWER},
+                "finish_reason": "stop",
+            } for _ in range(request.get("n") or 1)],
+            "usage": usage,
+        })
+
+    def _stream(self, completion_id, model, words, delay, usage, request):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def send(payload):
+            data = f"data: {payload}\n\n".encode()
+            self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+            self.wfile.flush()
+
+        def chunk(delta, finish_reason=None):
+            return json.dumps({
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            })
+
+        # The delay is time to first token; the rest streams at --tokens-per-second
+        time.sleep(delay)
+        send(chunk({"role": "assistant", "content": ""}))
+        for position, word in enumerate(words):
+            send(chunk({"content": word if position == 0 else " " + word}))
+            if self.config.tokens_per_second:
+                time.sleep(1 / self.config.tokens_per_second)
+        send(chunk({}, "stop"))
+        if (request.get("stream_options") or {}).get("include_usage"):
+            send(json.dumps({
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [],
+                "usage": usage,
+            }))
+        send("[DONE]")
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency", type=float, default=1.0,
+                        help="Mean seconds before answering (time to first token when streaming)")
+    parser.add_argument("--jitter", type=float, default=0.0,
+                        help="Standard deviation of the latency in seconds")
+    parser.add_argument("--tokens-per-second", type=float, default=200.0,
+                        help="Streaming speed; 0 sends all chunks at once")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="Share of requests (0-1) answered with --error-status")
+    parser.add_argument("--error-status", type=int, default=500)
+    return parser
+
+
+def serve(config):
+    FakeOpenAIHandler.config = config
+    server = ThreadingHTTPServer((config.host, config.port), FakeOpenAIHandler)
+    server.daemon_threads = True
+    return server
+
+
+if __name__ == "__main__":
+    config = build_parser().parse_args()
+    server = serve(config)
+    print(f"Fake OpenAI API on http://{config.host}:{config.port}/v1", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,413 @@
+"""
+Load test the app under different gunicorn worker classes and counts.
+
+For every worker setup this starts gunicorn against a separate benchmark
+database (benchmarks/settings.py) with OpenAI pointed at fake_openai.py, lets a
+number of virtual users log in and replay a mix of form submissions, history
+page views and logins, and records requests/sec, p50/p95/p99 latency per
+scenario and the resident memory of every worker. Results are written as JSON
+to benchmarks/results/ so runs can be compared with compare.py.
+
+Usage (from the repository root):
+
+    python benchmarks/loadtest.py --worker-class sync gthread uvicorn \\
+        --workers 2 4 --users 20 --duration 30 --latency 1.0
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import httpx
+
+import fake_openai
+
+ROOT = Path(__file__).resolve().parent.parent
+RESULTS_DIR = ROOT / "benchmarks" / "results"
+BENCH_PASSWORD = "bench-pass-123"
+
+WORKER_CLASSES = {
+    "sync": ("chatgpt.wsgi:application", "sync"),
+    "gthread": ("chatgpt.wsgi:application", "gthread"),
+    "uvicorn": ("chatgpt.asgi:application", "uvicorn_worker.UvicornWorker"),
+}
+
+COMPANIES = ["Acme Corp", "Globex", "Initech", "Umbrella", "Hooli", "Stark Industries"]
+TITLES = [
+    "Backend Engineer", "Frontend Engineer", "Data Engineer", "DevOps Engineer",
+    "Machine Learning Engineer", "Engineering Manager", "QA Engineer",
+]
+SKILLS = [
+    "Python, Django, PostgreSQL", "React, TypeScript, GraphQL", "Spark, Airflow, AWS",
+    "Kubernetes, Terraform, GCP", "PyTorch, MLflow, Python", "Java, Spring, Kafka",
+]
+LEVELS = ["Junior", "Mid-level", "Senior", "Lead", "3+ years", "5+ years"]
+LOCATIONS = ["Remote", "Berlin", "London", "New York", "Toronto", "Hybrid, Amsterdam"]
+TONES = ["", "", "Friendly and concise", "Formal", "Startup vibe"]
+
+
+def random_form():
+    return {
+        "company_name": random.choice(COMPANIES),
+        "job_title": random.choice(TITLES),
+        "tech_skills": random.choice(SKILLS),
+        "experience_level": random.choice(LEVELS),
+        "location": random.choice(LOCATIONS),
+        "company_tone": random.choice(TONES),
+    }
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(samples, seconds):
+    """
+    samples: list of (latency_seconds, ok) for one scenario.
+    """
+    latencies = sorted(latency for latency, _ in samples)
+    errors = sum(1 for _, ok in samples if not ok)
+    ms = lambda value: round(value * 1000, 1) if value is not None else None  # noqa: E731
+    return {
+        "requests": len(samples),
+        "errors": errors,
+        "requests_per_second": round(len(samples) / seconds, 2) if seconds else 0,
+        "p50_ms": ms(percentile(latencies, 50)),
+        "p95_ms": ms(percentile(latencies, 95)),
+        "p99_ms": ms(percentile(latencies, 99)),
+        "mean_ms": ms(sum(latencies) / len(latencies)) if latencies else None,
+    }
+
+
+def manage(env, *args):
+    subprocess.run(
+        [sys.executable, "manage.py", *args], cwd=ROOT, env=env, check=True,
+        stdout=subprocess.DEVNULL,
+    )
+
+
+def prepare_database(env, users):
+    manage(env, "migrate", "--noinput")
+    # benchmarks.settings runs with DEBUG off, so pages link the hashed files
+    manage(env, "collectstatic", "--noinput")
+    manage(env, "shell", "-c", (
+        "from django.contrib.auth.models import User\n"
+        f"for i in range({users}):\n"
+        "    user, created = User.objects.get_or_create(username=f'bench{i}')\n"
+        "    if created:\n"
+        f"        user.set_password('{BENCH_PASSWORD}')\n"
+        "        user.save()\n"
+    ))
+
+
+def worker_pids(master_pid):
+    """
+    Children of the gunicorn master, read from /proc (Linux only).
+    """
+    pids = []
+    for entry in Path("/proc").glob("[0-9]*"):
+        try:
+            stat = (entry / "stat").read_text()
+        except OSError:
+            continue
+        # The process name may contain spaces; the ppid is the 2nd field after it
+        fields = stat.rsplit(")", 1)[1].split()
+        if int(fields[1]) == master_pid:
+            pids.append(int(entry.name))
+    return pids
+
+
+def rss_mb(pid):
+    """
+    (current, peak) resident set size in MB from /proc/<pid>/status.
+    """
+    values = {}
+    try:
+        for line in Path(f"/proc/{pid}/status").read_text().splitlines():
+            key, _, value = line.partition(":")
+            if key in ("VmRSS", "VmHWM"):
+                values[key] = round(int(value.split()[0]) / 1024, 1)
+    except OSError:
+        return None, None
+    return values.get("VmRSS"), values.get("VmHWM")
+
+
+class MemorySampler(threading.Thread):
+    def __init__(self, master_pid, interval=1.0):
+        super().__init__(daemon=True)
+        self.master_pid = master_pid
+        self.interval = interval
+        self.peaks = {}
+        self.latest = {}
+        self.stopped = threading.Event()
+
+    def run(self):
+        if not Path("/proc").exists():
+            return
+        while not self.stopped.is_set():
+            for pid in worker_pids(self.master_pid):
+                current, peak = rss_mb(pid)
+                if current is None:
+                    continue
+                self.latest[pid] = current
+                self.peaks[pid] = max(self.peaks.get(pid, 0), peak or current)
+            self.stopped.wait(self.interval)
+
+    def report(self):
+        workers = [
+            {"pid": pid, "rss_mb": self.latest[pid], "peak_rss_mb": self.peaks[pid]}
+            for pid in sorted(self.latest)
+        ]
+        return {
+            "workers": workers,
+            "total_rss_mb": round(sum(worker["rss_mb"] for worker in workers), 1),
+            "max_peak_rss_mb": max((worker["peak_rss_mb"] for worker in workers), default=None),
+        }
+
+
+def start_gunicorn(worker_class, workers, threads, port, env, timeout):
+    app, worker = WORKER_CLASSES[worker_class]
+    env = dict(env)
+    env["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="jd_bench_metrics_")
+    if worker_class == "uvicorn":
+        env["JD_ASYNC_VIEWS"] = "True"
+
+    command = [
+        sys.executable, "-m", "gunicorn", app,
+        "-c", str(ROOT / "gunicorn.conf.py"),
+        "--bind", f"127.0.0.1:{port}",
+        "--workers", str(workers),
+        "--worker-class", worker,
+        "--timeout", str(timeout),
+        "--log-level", "warning",
+    ]
+    if worker_class == "gthread":
+        command += ["--threads", str(threads)]
+
+    process = subprocess.Popen(command, cwd=ROOT, env=env)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/login/", timeout=2).status_code == 200:
+                return process
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.25)
+    process.terminate()
+    raise RuntimeError(f"gunicorn ({worker_class}) did not start on port {port}")
+
+
+class VirtualUser(threading.Thread):
+    def __init__(self, index, base_url, mix, warmup_until, deadline, timeout, samples, lock):
+        super().__init__(daemon=True)
+        self.username = f"bench{index}"
+        self.http = httpx.Client(base_url=base_url, timeout=timeout)
+        self.mix = mix
+        self.warmup_until = warmup_until
+        self.deadline = deadline
+        self.samples = samples
+        self.lock = lock
+
+    def timed(self, scenario, expected_status, method, url, **kwargs):
+        start = time.monotonic()
+        try:
+            response = self.http.request(method, url, **kwargs)
+            ok = response.status_code == expected_status
+        except httpx.HTTPError:
+            ok = False
+        if start >= self.warmup_until:
+            with self.lock:
+                self.samples.setdefault(scenario, []).append((time.monotonic() - start, ok))
+        return ok
+
+    def csrf_headers(self):
+        return {"X-CSRFToken": self.http.cookies.get("csrftoken", "")}
+
+    def login(self):
+        self.http.cookies.clear()
+        self.http.get("/login/")
+        return self.timed(
+            "login", 302, "POST", "/login/",
+            data={"username": self.username, "password": BENCH_PASSWORD},
+            headers=self.csrf_headers(),
+        )
+
+    def run(self):
+        try:
+            self.login()
+            scenarios, weights = zip(*self.mix.items())
+            while time.monotonic() < self.deadline:
+                scenario = random.choices(scenarios, weights)[0]
+                if scenario == "home":
+                    self.timed("home", 200, "POST", "/", data=random_form(), headers=self.csrf_headers())
+                elif scenario == "past":
+                    self.timed("past", 200, "GET", "/past")
+                else:
+                    self.login()
+        finally:
+            self.http.close()
+
+
+def run_load(base_url, users, duration, warmup, mix, timeout):
+    samples = {}
+    lock = threading.Lock()
+    started = time.monotonic()
+    warmup_until = started + warmup
+    deadline = warmup_until + duration
+    threads = [
+        VirtualUser(index, base_url, mix, warmup_until, deadline, timeout, samples, lock)
+        for index in range(users)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # Requests still in flight at the deadline count towards the measured window
+    measured = max(duration, time.monotonic() - warmup_until)
+
+    all_samples = [sample for scenario in samples.values() for sample in scenario]
+    return {
+        "measured_seconds": round(measured, 2),
+        "overall": summarize(all_samples, measured),
+        "scenarios": {name: summarize(values, measured) for name, values in sorted(samples.items())},
+    }
+
+
+def parse_mix(value):
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name not in ("home", "past", "login"):
+            raise argparse.ArgumentTypeError(f"unknown scenario {name!r}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True,
+        ).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Load test the app under gunicorn.")
+    parser.add_argument("--worker-class", nargs="+", choices=sorted(WORKER_CLASSES),
+                        default=["sync", "uvicorn"])
+    parser.add_argument("--workers", nargs="+", type=int, default=[2])
+    parser.add_argument("--threads", type=int, default=8, help="Threads per gthread worker")
+    parser.add_argument("--users", type=int, default=20, help="Concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=30, help="Measured seconds per run")
+    parser.add_argument("--warmup", type=float, default=5, help="Seconds excluded from the stats")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("home=5,past=4,login=1"),
+                        help="Scenario weights, e.g. home=5,past=4,login=1")
+    parser.add_argument("--timeout", type=float, default=120, help="Client and worker timeout")
+    parser.add_argument("--latency", type=float, default=1.0, help="Fake OpenAI mean latency")
+    parser.add_argument("--jitter", type=float, default=0.2, help="Fake OpenAI latency std dev")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fake OpenAI error share")
+    parser.add_argument("--output", type=Path, help="JSON file (default: benchmarks/results/<time>.json)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    fake_port = free_port()
+    fake_config = fake_openai.build_parser().parse_args([
+        "--port", str(fake_port),
+        "--latency", str(args.latency),
+        "--jitter", str(args.jitter),
+        "--error-rate", str(args.error_rate),
+    ])
+    fake_server = fake_openai.serve(fake_config)
+    threading.Thread(target=fake_server.serve_forever, daemon=True).start()
+
+    env = dict(os.environ)
+    env.update({
+        "DJANGO_SETTINGS_MODULE": "benchmarks.settings",
+        "OPENAI_API_KEY": "fake",
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{fake_port}/v1",
+    })
+    env.pop("JD_ASYNC_VIEWS", None)
+    prepare_database(env, args.users)
+
+    started_at = datetime.now(timezone.utc)
+    runs = []
+    for worker_class in args.worker_class:
+        for workers in args.workers:
+            port = free_port()
+            print(f"{worker_class} x{workers}: {args.users} users for {args.duration:.0f}s...", flush=True)
+            upstream_before = fake_openai.FakeOpenAIHandler.requests_seen
+            process = start_gunicorn(worker_class, workers, args.threads, port, env, int(args.timeout))
+            sampler = MemorySampler(process.pid)
+            sampler.start()
+            try:
+                result = run_load(
+                    f"http://127.0.0.1:{port}", args.users, args.duration, args.warmup,
+                    args.mix, args.timeout,
+                )
+            finally:
+                sampler.stopped.set()
+                sampler.join()
+                process.terminate()
+                process.wait(timeout=30)
+
+            run = {
+                "worker_class": worker_class,
+                "workers": workers,
+                "threads": args.threads if worker_class == "gthread" else 1,
+                **result,
+                "upstream_requests": fake_openai.FakeOpenAIHandler.requests_seen - upstream_before,
+                "memory": sampler.report(),
+            }
+            runs.append(run)
+            overall = run["overall"]
+            print(
+                f"  {overall['requests_per_second']} req/s, p50 {overall['p50_ms']} ms, "
+                f"p95 {overall['p95_ms']} ms, p99 {overall['p99_ms']} ms, "
+                f"{overall['errors']} errors, {run['memory']['total_rss_mb']} MB RSS",
+                flush=True,
+            )
+
+    fake_server.shutdown()
+
+    report = {
+        "started_at": started_at.isoformat(),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "config": {
+            key: value for key, value in vars(args).items() if key != "output"
+        },
+        "runs": runs,
+    }
+    output = args.output or RESULTS_DIR / f"{started_at:%Y%m%d-%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"Results written to {output}")
+    return report
+
+
+if __name__ == "__main__":
+    main()
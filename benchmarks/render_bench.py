@@ -0,0 +1,111 @@
+"""
+Micro-benchmark: JD renderer against the earlier escape + regex chain.
+
+Renders a history page's worth of job descriptions repeatedly with
+  - legacy: the renderer used up to RENDERER_VERSION 1 (kept here for reference)
+  - single-pass, cold: chatbot.utils with its LRU cache cleared before each page
+  - single-pass, cached: chatbot.utils with the cache warm, as on a repeat visit
+
+Usage (from the repository root):
+
+    python benchmarks/render_bench.py --rows 50 --size 4000 --repeat 20
+"""
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "chatgpt.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.utils.html import escape  # noqa: E402
+from django.utils.safestring import mark_safe  # noqa: E402
+
+from chatbot import utils  # noqa: E402
+
+SECTIONS = ["Responsibilities", "Requirements", "Nice to Have", "About Us"]
+WORDS = (
+    "design build operate scalable services python django postgres customers team "
+    "mentor review roadmap cloud kubernetes reliable <fast> & \"secure\" it's"
+).split()
+
+
+def legacy_render(text):
+    if not text:
+        return ""
+    escaped = escape(text)
+    formatted = re.sub(
+        r"\*\*(.+?)\*\*",
+        lambda match: f"<strong>{match.group(1).upper()}</strong>",
+        escaped,
+    )
+    formatted = re.sub(r"(^|\n)-\s*", r"\1• ", formatted)
+    formatted = formatted.replace("\n", "<br>")
+    return mark_safe(formatted)
+
+
+def sample_job_description(rng, size):
+    lines = [f"**{rng.choice(['Senior', 'Staff', 'Lead'])} Engineer**", ""]
+    while sum(len(line) + 1 for line in lines) < size:
+        lines.append(f"**{rng.choice(SECTIONS)}:**")
+        for _ in range(rng.randint(3, 7)):
+            lines.append("- " + " ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 16))))
+        lines.append("")
+        lines.append(" ".join(rng.choice(WORDS) for _ in range(40)))
+        lines.append("")
+    return "\n".join(lines)
+
+
+def time_pages(render, texts, repeat, before_page=None):
+    timings = []
+    for _ in range(repeat):
+        if before_page:
+            before_page()
+        start = time.perf_counter()
+        for text in texts:
+            render(text)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return {
+        "median_ms": round(timings[len(timings) // 2] * 1000, 3),
+        "min_ms": round(timings[0] * 1000, 3),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the JD renderer.")
+    parser.add_argument("--rows", type=int, default=50, help="Job descriptions per page")
+    parser.add_argument("--size", type=int, default=4000, help="Characters per job description")
+    parser.add_argument("--repeat", type=int, default=20, help="Pages rendered per variant")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(42)
+    texts = [sample_job_description(rng, args.size) for _ in range(args.rows)]
+
+    results = {
+        "rows": args.rows,
+        "size": args.size,
+        "legacy": time_pages(legacy_render, texts, args.repeat),
+        "single_pass_cold": time_pages(
+            utils.render_job_description, texts, args.repeat, utils.render_cache.clear
+        ),
+    }
+    utils.render_cache.clear()
+    for text in texts:
+        utils.render_job_description(text)
+    results["single_pass_cached"] = time_pages(utils.render_job_description, texts, args.repeat)
+
+    print(json.dumps(results, indent=2))
+    return results
+
+
+if __name__ == "__main__":
+    main()
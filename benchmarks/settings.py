@@ -0,0 +1,31 @@
+"""
+Settings for load tests (DJANGO_SETTINGS_MODULE=benchmarks.settings).
+
+Same as chatgpt.settings, but with a separate SQLite file so benchmark users
+and history never mix with real data, and without per-user limits, which
+would otherwise cap the request rate of every virtual user.
+"""
+import os
+
+from chatgpt.settings import *  # noqa: F401,F403
+from chatgpt.settings import BASE_DIR, DATABASES as BASE_DATABASES
+
+DEBUG = False
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.getenv('JD_BENCH_DB', BASE_DIR / 'benchmarks' / 'bench.sqlite3'),
+        'CONN_MAX_AGE': BASE_DATABASES['default']['CONN_MAX_AGE'],
+        'CONN_HEALTH_CHECKS': True,
+    }
+}
+
+JD_RATE_LIMITS = {
+    'default': {'requests_per_minute': None, 'tokens_per_day': None},
+    'groups': {},
+    'users': {},
+}
+
+# Virtual users submit overlapping forms and would be asked to reuse them
+JD_SIMILARITY_SUGGESTIONS = False
@@ -1,5 +1,43 @@
 from django.contrib import admin
-from .models import Past, UserProfile
+from .models import (
+    Past, UserProfile, CachedResponse, Draft, GenerationJob, GenerationBatch, DailyTokenUsage, UsageLimit,
+)
 
 admin.site.register(Past)
-admin.site.register(UserProfile)
\ No newline at end of file
+admin.site.register(UserProfile)
+
+
+@admin.register(CachedResponse)
+class CachedResponseAdmin(admin.ModelAdmin):
+    list_display = ('fingerprint', 'hit_count', 'created_at', 'last_used_at')
+    ordering = ('-last_used_at',)
+
+
+@admin.register(Draft)
+class DraftAdmin(admin.ModelAdmin):
+    list_display = ('id', 'user', 'group', 'position', 'promoted', 'created_at')
+    ordering = ('-created_at', 'position')
+
+
+@admin.register(GenerationJob)
+class GenerationJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'user', 'status', 'attempts', 'worker_id', 'created_at', 'finished_at')
+    list_filter = ('status',)
+
+
+@admin.register(GenerationBatch)
+class GenerationBatchAdmin(admin.ModelAdmin):
+    list_display = ('id', 'name', 'user', 'status', 'total', 'completed', 'failed', 'skipped', 'created_at')
+    list_filter = ('status',)
+
+
+@admin.register(UsageLimit)
+class UsageLimitAdmin(admin.ModelAdmin):
+    list_display = ('id', 'user', 'group', 'requests_per_minute', 'tokens_per_day')
+
+
+@admin.register(DailyTokenUsage)
+class DailyTokenUsageAdmin(admin.ModelAdmin):
+    list_display = ('user', 'day', 'tokens')
+    list_filter = ('day',)
+    ordering = ('-day', '-tokens')
@@ -0,0 +1,290 @@
+"""
+Bulk generation from an uploaded CSV or JSONL file.
+
+OpenAI calls for a batch fan out over a bounded thread pool; the threads only
+talk to OpenAI, while the calling thread owns every database write and flushes
+results with bulk_create/bulk_update in chunks. Before each row is submitted the
+user's daily token budget is checked; once it runs out the remaining rows are
+marked skipped.
+
+A jd_batch process holds a lease on the batch it runs and renews it while
+working. If the process dies, another one resumes the batch's pending rows once
+the lease has expired.
+"""
+import csv
+import io
+import json
+import logging
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.text import slugify
+
+from . import history, ratelimit, response_cache, routing, similarity
+from .generation import (
+    GENERATION_FAILED_MESSAGE,
+    GENERATION_PARAMS,
+    JD_FORM_FIELDS,
+    fingerprint_for,
+    question_for_history,
+    request_completion,
+)
+from .models import BatchItem, GenerationBatch, Past
+
+logger = logging.getLogger(__name__)
+
+REQUIRED_FIELDS = ("company_name", "job_title", "tech_skills", "experience_level", "location")
+BUDGET_SKIPPED = "Not generated: today's token budget ran out."
+
+
+class BatchFileError(ValueError):
+    pass
+
+
+def _normalize_row(row, line):
+    row = {str(key).strip(): str(value or "").strip() for key, value in row.items() if key}
+    # build_jd_prompt calls the free-text field optional_notes; the form calls it company_tone
+    if "optional_notes" in row and "company_tone" not in row:
+        row["company_tone"] = row.pop("optional_notes")
+
+    missing = [name for name in REQUIRED_FIELDS if not row.get(name)]
+    if missing:
+        raise BatchFileError(f"Row {line}: missing {', '.join(missing)}")
+
+    return {name: row.get(name, "") for name in JD_FORM_FIELDS}
+
+
+def parse_batch_file(uploaded_file):
+    """
+    Read a CSV (header row required) or JSONL upload into a list of form dicts.
+    """
+    try:
+        text = uploaded_file.read().decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise BatchFileError("The file must be UTF-8 encoded.")
+
+    if uploaded_file.name.lower().endswith((".jsonl", ".ndjson")):
+        rows = []
+        for line, raw in enumerate(text.splitlines(), start=1):
+            if not raw.strip():
+                continue
+            try:
+                rows.append((line, json.loads(raw)))
+            except json.JSONDecodeError:
+                raise BatchFileError(f"Line {line}: not valid JSON")
+            if not isinstance(rows[-1][1], dict):
+                raise BatchFileError(f"Line {line}: expected a JSON object")
+    else:
+        rows = list(enumerate(csv.DictReader(io.StringIO(text)), start=2))
+
+    if not rows:
+        raise BatchFileError("The file does not contain any rows.")
+
+    max_rows = getattr(settings, "JD_BATCH_MAX_ROWS", 500)
+    if len(rows) > max_rows:
+        raise BatchFileError(f"A batch can contain at most {max_rows} rows.")
+
+    return [_normalize_row(row, line) for line, row in rows]
+
+
+def create_batch(user, name, forms):
+    with transaction.atomic():
+        batch = GenerationBatch.objects.create(user=user, name=name, total=len(forms))
+        BatchItem.objects.bulk_create(
+            BatchItem(batch=batch, position=position, form=form)
+            for position, form in enumerate(forms, start=1)
+        )
+    return batch
+
+
+def _claimable(now):
+    # Batches claimed before leases existed have none; treat them as expired
+    return Q(status=GenerationBatch.PENDING) | Q(
+        Q(lease_expires_at__lt=now) | Q(lease_expires_at__isnull=True),
+        status=GenerationBatch.RUNNING,
+    )
+
+
+def claim_pending_batch(worker_id="", lease_seconds=None):
+    """
+    Lease the oldest pending batch, or a running one whose lease expired, to
+    this worker; returns None when there is none.
+    """
+    lease_seconds = lease_seconds or getattr(settings, "JD_BATCH_LEASE_SECONDS", 120)
+    now = timezone.now()
+    candidates = GenerationBatch.objects.filter(_claimable(now)).order_by("created_at")
+
+    for batch_id in candidates.values_list("pk", flat=True)[:10]:
+        claimed = GenerationBatch.objects.filter(_claimable(now), pk=batch_id).update(
+            status=GenerationBatch.RUNNING,
+            worker_id=worker_id,
+            lease_expires_at=now + timedelta(seconds=lease_seconds),
+        )
+        if claimed:
+            return GenerationBatch.objects.get(pk=batch_id)
+    return None
+
+
+def _flush(batch, finished):
+    """
+    Persist one chunk of finished items and advance the batch counters.
+    """
+    done = [item for item in finished if item.status == BatchItem.DONE]
+    skipped = sum(item.status == BatchItem.SKIPPED for item in finished)
+    with transaction.atomic():
+        BatchItem.objects.bulk_update(finished, ["status", "result", "error"])
+        # bulk_create skips save() and post_save, so render and index here
+        pasts = Past.objects.bulk_create(
+            Past(
+                user_id=batch.user_id,
+                question=question_for_history(item.form),
+                answer=item.result,
+                **getattr(item, "usage", {}),
+            ).render_html()
+            for item in done
+        )
+        similarity.index_pasts(pasts)
+        history.touch(batch.user_id)
+        GenerationBatch.objects.filter(pk=batch.pk).update(
+            completed=F("completed") + len(done),
+            failed=F("failed") + len(finished) - len(done) - skipped,
+            skipped=F("skipped") + skipped,
+        )
+
+
+def run_batch(batch, concurrency=None, chunk_size=None):
+    """
+    Generate every pending item of a batch with at most `concurrency` calls in flight.
+    """
+    concurrency = concurrency or getattr(settings, "JD_BATCH_CONCURRENCY", 8)
+    chunk_size = chunk_size or getattr(settings, "JD_BATCH_CHUNK_SIZE", 25)
+    lease_seconds = getattr(settings, "JD_BATCH_LEASE_SECONDS", 120)
+    owned = GenerationBatch.objects.filter(
+        pk=batch.pk, status=GenerationBatch.RUNNING, worker_id=batch.worker_id
+    )
+    renewed_at = time.monotonic()
+
+    def renew_lease():
+        """
+        Extend the lease every third of its length; False once another worker owns the batch.
+        """
+        nonlocal renewed_at
+        if time.monotonic() - renewed_at < lease_seconds / 3:
+            return True
+        renewed_at = time.monotonic()
+        return bool(owned.update(lease_expires_at=timezone.now() + timedelta(seconds=lease_seconds)))
+
+    pending = list(batch.items.filter(status=BatchItem.PENDING))
+    finished = []
+
+    def collect(item):
+        finished.append(item)
+        if len(finished) >= chunk_size:
+            _flush(batch, finished)
+            finished.clear()
+
+    def finish(item, result=None, failed=False, usage=None):
+        if not failed:
+            item.status = BatchItem.DONE
+            item.result = result or "No response received from the model."
+            # Not a BatchItem field; _flush copies it onto the Past row
+            item.usage = usage or {}
+        else:
+            item.status = BatchItem.FAILED
+            item.error = GENERATION_FAILED_MESSAGE
+        collect(item)
+
+    # Rows already answered for identical inputs never leave the process
+    to_generate = deque()
+    for item in pending:
+        # Routes are chosen here so that the worker threads never touch the database
+        route = routing.choose(item.form, GENERATION_PARAMS)
+        fingerprint = fingerprint_for(item.form, route)
+        cached_answer = response_cache.lookup(fingerprint)
+        if cached_answer is not None:
+            finish(item, cached_answer)
+        else:
+            to_generate.append((item, route, fingerprint))
+
+    in_flight = {}
+    out_of_budget = False
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        while True:
+            # Submitting row by row checks each one against the tokens charged so far
+            while to_generate and not out_of_budget and len(in_flight) < concurrency:
+                try:
+                    ratelimit.check_token_budget(batch.user)
+                except ratelimit.RateLimitExceeded:
+                    out_of_budget = True
+                    break
+                item, route, fingerprint = to_generate.popleft()
+                future = executor.submit(request_completion, item.form, route)
+                in_flight[future] = (item, fingerprint)
+            if not in_flight:
+                break
+
+            completed, _ = wait(in_flight, timeout=lease_seconds / 3, return_when=FIRST_COMPLETED)
+            for future in completed:
+                item, fingerprint = in_flight.pop(future)
+                try:
+                    completion = future.result()
+                except Exception:
+                    logger.exception("Batch %s row %s failed", batch.pk, item.position)
+                    finish(item, failed=True)
+                    continue
+                ratelimit.charge_tokens(batch.user_id, completion.total_tokens)
+                if completion.text:
+                    response_cache.store(fingerprint, completion.text)
+                finish(item, completion.text, usage=completion.past_fields())
+
+            if not renew_lease():
+                # Another worker resumed the batch; it regenerates every row not flushed yet
+                batch.refresh_from_db()
+                return batch
+
+    for item, _, _ in to_generate:
+        item.status = BatchItem.SKIPPED
+        item.error = BUDGET_SKIPPED
+        collect(item)
+
+    if finished:
+        _flush(batch, finished)
+
+    owned.update(status=GenerationBatch.DONE, finished_at=timezone.now(), lease_expires_at=None)
+    batch.refresh_from_db()
+    return batch
+
+
+def export_jsonl(batch):
+    for item in batch.items.all():
+        yield json.dumps(
+            {
+                **item.form,
+                "status": item.status,
+                "job_description": item.result,
+                "error": item.error,
+            },
+            ensure_ascii=False,
+        ) + "\n"
+
+
+def export_zip(batch):
+    """
+    One text file per finished item, named after its row number and job title.
+    """
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for item in batch.items.filter(status=BatchItem.DONE):
+            name = slugify(item.form.get("job_title", "")) or "job-description"
+            archive.writestr(
+                f"{item.position:03d}-{name}.txt",
+                f"{question_for_history(item.form)}\n\n{item.result}\n",
+            )
+    return buffer.getvalue()
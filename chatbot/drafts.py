@@ -0,0 +1,72 @@
+"""
+Drafts from multi-variant generations.
+
+All variants of one request are saved as Draft rows sharing a group. Only the
+variant the user picks becomes a Past row (and so shows up in the history,
+search and similarity suggestions); the others are kept as drafts.
+"""
+import uuid
+
+from django.db import transaction
+
+from .models import Draft, Past
+
+
+def save_variants(user, question, completions):
+    """
+    Store the candidate answers of one request; returns (group, drafts).
+    """
+    group = uuid.uuid4()
+    drafts = Draft.objects.bulk_create(
+        Draft(
+            user=user,
+            group=group,
+            position=position,
+            question=question,
+            answer=completion.text or "No response received from the model.",
+            usage=completion.past_fields(),
+        )
+        for position, completion in enumerate(completions, start=1)
+    )
+    return group, drafts
+
+
+def pending(user, group):
+    """
+    The drafts of a group while none of them has been promoted, else [].
+    """
+    drafts = list(Draft.objects.filter(user=user, group=group))
+    if any(draft.promoted_id for draft in drafts):
+        return []
+    return drafts
+
+
+class DraftError(ValueError):
+    pass
+
+
+def promote(draft):
+    """
+    Save the chosen draft as a Past row. Promoting a draft again returns the
+    same row, so a double-submitted choice does not add a second history entry;
+    once one draft of a group is promoted, its siblings raise DraftError.
+    """
+    with transaction.atomic():
+        # Lock the whole group so two different choices cannot both be kept
+        group = list(
+            Draft.objects.select_for_update().filter(group=draft.group).order_by("pk")
+        )
+        draft = next(member for member in group if member.pk == draft.pk)
+        if draft.promoted_id:
+            return draft.promoted
+        if any(member.promoted_id for member in group):
+            raise DraftError("Another version of this job description has already been kept.")
+        past = Past.objects.create(
+            user_id=draft.user_id,
+            question=draft.question,
+            answer=draft.answer,
+            **draft.usage,
+        )
+        draft.promoted = past
+        draft.save(update_fields=["promoted"])
+    return past
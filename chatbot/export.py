@@ -0,0 +1,178 @@
+"""
+Streaming export of a user's generation history.
+
+Rows are read with a chunked iterator and each one is encoded and handed to
+the response as soon as it is read, so memory stays flat however long the
+history is. Under ASGI the same exporters are driven by QuerySet.aiterator(),
+because Django would otherwise buffer a sync iterator before sending it.
+"""
+import csv
+import io
+import json
+import zipfile
+
+from django.conf import settings
+from django.utils.text import slugify
+
+from .history import in_date_range
+from .models import Past
+from .similarity import parse_question
+
+CSV_COLUMNS = (
+    "id",
+    "created_at",
+    "company",
+    "job_title",
+    "tech_skills",
+    "experience_level",
+    "location",
+    "optional_notes",
+    "job_description",
+)
+
+
+def _fields(past):
+    inputs = parse_question(past.question)
+    return {
+        "id": past.pk,
+        "created_at": past.created_at.isoformat(),
+        "company": inputs.get("company", ""),
+        "job_title": inputs.get("job title", ""),
+        "tech_skills": inputs.get("tech skills", ""),
+        "experience_level": inputs.get("experience level", ""),
+        "location": inputs.get("location", ""),
+        "optional_notes": inputs.get("optional", ""),
+        "job_description": past.answer,
+    }
+
+
+class _Echo:
+    """
+    File-like object whose write() returns the data, for csv.writer.
+    """
+
+    def write(self, value):
+        return value
+
+
+class _ZipStream(io.RawIOBase):
+    """
+    Write-only sink that hands out whatever ZipFile wrote since the last drain.
+    ZipFile switches to data descriptors because this stream cannot seek.
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class CSVExporter:
+    content_type = "text/csv; charset=utf-8"
+    extension = "csv"
+
+    def __init__(self):
+        self._writer = csv.writer(_Echo())
+
+    def header(self):
+        # A BOM so Excel opens the UTF-8 file correctly
+        return "\ufeff" + self._writer.writerow(CSV_COLUMNS)
+
+    def row(self, past):
+        fields = _fields(past)
+        return self._writer.writerow([fields[column] for column in CSV_COLUMNS])
+
+    def footer(self):
+        return ""
+
+
+class JSONLExporter:
+    content_type = "application/x-ndjson"
+    extension = "jsonl"
+
+    def header(self):
+        return ""
+
+    def row(self, past):
+        return json.dumps(_fields(past), ensure_ascii=False) + "\n"
+
+    def footer(self):
+        return ""
+
+
+class MarkdownZipExporter:
+    """
+    One Markdown file per job description, in a zip built on the fly.
+    """
+
+    content_type = "application/zip"
+    extension = "zip"
+
+    def __init__(self):
+        self._stream = _ZipStream()
+        self._archive = zipfile.ZipFile(self._stream, "w", zipfile.ZIP_DEFLATED)
+
+    def header(self):
+        return b""
+
+    def row(self, past):
+        fields = _fields(past)
+        title = fields["job_title"] or "Job description"
+        heading = f"{title} at {fields['company']}" if fields["company"] else title
+        lines = [f"# {heading}", "", f"_Generated {past.created_at:%Y-%m-%d %H:%M}_", "", "## Inputs", ""]
+        lines += [f"- {line}" for line in past.question.splitlines() if line.strip()]
+        lines += ["", "## Job description", "", past.answer, ""]
+
+        name = slugify(title) or "job-description"
+        self._archive.writestr(
+            f"{past.created_at:%Y%m%d}-{past.pk}-{name}.md", "\n".join(lines)
+        )
+        return self._stream.drain()
+
+    def footer(self):
+        self._archive.close()
+        return self._stream.drain()
+
+
+EXPORTERS = {
+    "csv": CSVExporter,
+    "jsonl": JSONLExporter,
+    "zip": MarkdownZipExporter,
+}
+
+
+def history_queryset(user, start=None, end=None):
+    """
+    The user's rows oldest first, optionally limited to local dates start..end
+    (both inclusive).
+    """
+    rows = in_date_range(Past.objects.filter(user=user), start, end)
+    return rows.order_by("created_at", "id").only("id", "created_at", "question", "answer")
+
+
+def _chunk_size():
+    return getattr(settings, "JD_EXPORT_CHUNK_SIZE", 500)
+
+
+def stream(exporter, rows):
+    yield exporter.header()
+    for past in rows.iterator(chunk_size=_chunk_size()):
+        yield exporter.row(past)
+    yield exporter.footer()
+
+
+async def astream(exporter, rows):
+    yield exporter.header()
+    async for past in rows.aiterator(chunk_size=_chunk_size()):
+        yield exporter.row(past)
+    yield exporter.footer()
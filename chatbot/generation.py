@@ -0,0 +1,317 @@
+import time
+from dataclasses import dataclass
+
+from . import metrics, ratelimit, resilience, response_cache, routing, singleflight
+from .models import Past
+from .openai_client import get_client
+from .similarity import parse_question
+
+SYSTEM_PROMPT = "You write polished, professional job descriptions."
+
+# Shown to users and stored on failed jobs and batch rows instead of the exception text
+GENERATION_FAILED_MESSAGE = "The job description could not be generated. Please try again."
+
+# Base model parameters; chatbot.routing may swap the model and lower max_tokens
+# per request. These base values are part of the response cache key.
+GENERATION_PARAMS = {
+    "model": "gpt-3.5-turbo",
+    "temperature": 0.7,
+    "max_tokens": 700,
+    "top_p": 1.0,
+    "frequency_penalty": 0.0,
+    "presence_penalty": 0.0,
+}
+
+
+def build_jd_prompt(company_name, job_title, tech_skills, experience_level, location, optional_notes):
+    """
+    Combine 5 required fields plus 1 optional free-text field into a clear prompt.
+    """
+    base_prompt = f"""
+You are an experienced technical recruiter and HR specialist.
+
+Based on the following information, write a complete job description in English.
+
+- Company: {company_name}
+- Job Title: {job_title}
+- Tech Skills: {tech_skills}
+- Experience Level: {experience_level}
+- Location: {location}
+"""
+
+    if optional_notes:
+        base_prompt += f"- Extra notes from the user (optional): {optional_notes}\n"
+
+    base_prompt += """
+Requirements:
+
+* Start with the job title as a heading.
+* Then add a section "Responsibilities:" as bullet points.
+* Then a section "Requirements:" as bullet points.
+* Optionally add a "Nice to Have:" section if it makes sense.
+* End with a short paragraph about location / remote policy and company culture.
+* Length around 300 to 500 words.
+"""
+    return base_prompt
+
+
+JD_FORM_FIELDS = (
+    "company_name",
+    "job_title",
+    "tech_skills",
+    "experience_level",
+    "location",
+    "company_tone",
+)
+
+
+def prompt_fields(form):
+    """
+    Map the form fields onto the build_jd_prompt keyword arguments.
+    """
+    return {
+        "company_name": form["company_name"],
+        "job_title": form["job_title"],
+        "tech_skills": form["tech_skills"],
+        "experience_level": form["experience_level"],
+        "location": form["location"],
+        "optional_notes": form["company_tone"],
+    }
+
+
+def build_messages(form):
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": build_jd_prompt(**prompt_fields(form))},
+    ]
+
+
+def question_for_history(form):
+    lines = [
+        f"Company: {form['company_name']}",
+        f"Job Title: {form['job_title']}",
+        f"Tech Skills: {form['tech_skills']}",
+        f"Experience Level: {form['experience_level']}",
+        f"Location: {form['location']}",
+    ]
+
+    if form["company_tone"]:
+        lines.append(f"Optional: {form['company_tone']}")
+
+    return "\n".join(lines)
+
+
+def form_from_question(question):
+    """
+    The generator form fields recovered from a stored question.
+    """
+    form = {name: "" for name in JD_FORM_FIELDS}
+    labels = parse_question(question)
+    form.update(
+        company_name=labels.get("company", ""),
+        job_title=labels.get("job title", ""),
+        tech_skills=labels.get("tech skills", ""),
+        experience_level=labels.get("experience level", ""),
+        location=labels.get("location", ""),
+        company_tone=labels.get("optional", ""),
+    )
+    return form
+
+
+@dataclass
+class Completion:
+    text: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    route: routing.Route = None
+    latency_ms: int = None
+    truncated: bool = False
+
+    @property
+    def total_tokens(self):
+        return self.prompt_tokens + self.completion_tokens
+
+    def past_fields(self):
+        """
+        Usage columns for the Past row that stores this completion.
+        """
+        return usage_fields(
+            self.route, self.prompt_tokens, self.completion_tokens, self.latency_ms, self.truncated
+        )
+
+
+def usage_fields(route, prompt_tokens, completion_tokens, latency_ms, truncated):
+    if route is None:
+        return {}
+    return {
+        "model": route.model,
+        "route": route.label,
+        "max_tokens": route.params["max_tokens"],
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "latency_ms": latency_ms,
+        "truncated": truncated,
+    }
+
+
+def elapsed_ms(started):
+    return round((time.monotonic() - started) * 1000)
+
+
+def usage_tokens(usage):
+    """
+    (prompt_tokens, completion_tokens) from a response.usage object, if any.
+    """
+    if usage is None:
+        return 0, 0
+    return int(usage.prompt_tokens or 0), int(usage.completion_tokens or 0)
+
+
+def request_completion(form, route=None, messages=None):
+    """
+    Call OpenAI for one form, or for explicit `messages` about it, and return
+    a Completion with the stripped text.
+
+    Uses the given Route, or picks one with routing.choose(). Apart from that
+    choice (whose statistics are cached) it touches no database, so it is safe
+    to run in worker threads. Raises resilience.GenerationUnavailable when the
+    model cannot be reached in time.
+    """
+    route = route or routing.choose(form, GENERATION_PARAMS)
+    started = time.monotonic()
+    response = resilience.call(
+        lambda timeout: get_client().chat.completions.create(
+            messages=messages or build_messages(form),
+            timeout=timeout,
+            **route.params,
+        ),
+        route.model,
+    )
+    prompt_tokens, completion_tokens = usage_tokens(response.usage)
+    metrics.record_tokens(route.model, prompt_tokens, completion_tokens)
+    return Completion(
+        text=response.choices[0].message.content.strip(),
+        prompt_tokens=prompt_tokens,
+        completion_tokens=completion_tokens,
+        route=route,
+        latency_ms=elapsed_ms(started),
+        truncated=response.choices[0].finish_reason == "length",
+    )
+
+
+def request_variants(form, n, route=None):
+    """
+    Call OpenAI once for n alternative answers (the `n` parameter) and return
+    one Completion per choice.
+
+    The prompt is sent and billed once, so each Completion carries the full
+    prompt_tokens and an even share of the completion tokens; usage is only
+    reported for the call as a whole.
+    """
+    route = route or routing.choose(form, GENERATION_PARAMS)
+    started = time.monotonic()
+    response = resilience.call(
+        lambda timeout: get_client().chat.completions.create(
+            messages=build_messages(form),
+            n=n,
+            timeout=timeout,
+            **route.params,
+        ),
+        route.model,
+    )
+    prompt_tokens, completion_tokens = usage_tokens(response.usage)
+    metrics.record_tokens(route.model, prompt_tokens, completion_tokens)
+    latency_ms = elapsed_ms(started)
+    return [
+        Completion(
+            text=choice.message.content.strip(),
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens // len(response.choices),
+            route=route,
+            latency_ms=latency_ms,
+            truncated=choice.finish_reason == "length",
+        )
+        for choice in response.choices
+    ]
+
+
+def generate_variants(form, n, user_id=None):
+    """
+    Return n candidate Completions for a form from a single OpenAI call.
+
+    Variants always come from the model: the response cache only ever holds
+    one answer per input. The whole call is charged to user_id's daily budget.
+    """
+    completions = request_variants(form, n)
+    if completions:
+        ratelimit.charge_tokens(
+            user_id,
+            completions[0].prompt_tokens + sum(c.completion_tokens for c in completions),
+        )
+    return completions
+
+
+def fingerprint_for(form, route):
+    """
+    Response cache key for a form sent with `route`: an answer is only reused
+    for the same model, max_tokens and other parameters.
+    """
+    return response_cache.make_fingerprint(prompt_fields(form), route.params)
+
+
+def degraded_answer(fingerprint, form, user_id=None):
+    """
+    Best earlier answer for identical inputs while the model is unavailable:
+    the cached answer even if expired, else the user's latest matching history row.
+    """
+    answer = response_cache.peek(fingerprint)
+    if answer is None and user_id is not None:
+        past = (
+            Past.objects.filter(user_id=user_id, question=question_for_history(form))
+            .order_by("-created_at")
+            .only("answer")
+            .first()
+        )
+        answer = past.answer if past else None
+    return answer
+
+
+def generate_job_description(form, force_regenerate=False, user_id=None):
+    """
+    Return (job_description, cache_hit, completion) for a submitted form;
+    completion is None when no new answer was generated.
+
+    Identical inputs reuse the cached answer unless force_regenerate is set,
+    and wait for an identical generation already in flight (chatbot.singleflight).
+    Tokens spent on a fresh completion are charged to user_id's daily budget.
+    If the model is unavailable, an earlier answer for the same inputs is
+    returned as a cache hit; without one GenerationUnavailable propagates.
+    """
+    route = routing.choose(form, GENERATION_PARAMS)
+    fingerprint = fingerprint_for(form, route)
+
+    cached_answer = None if force_regenerate else response_cache.lookup(fingerprint)
+    if cached_answer is not None:
+        return cached_answer, True, None
+
+    with singleflight.flight(fingerprint) as shared_answer:
+        if shared_answer is not None:
+            return shared_answer, True, None
+
+        try:
+            completion = request_completion(form, route)
+        except resilience.GenerationUnavailable:
+            fallback = degraded_answer(fingerprint, form, user_id)
+            if fallback is None:
+                raise
+            return fallback, True, None
+
+        ratelimit.charge_tokens(user_id, completion.total_tokens)
+
+        job_description = completion.text
+        if job_description:
+            response_cache.store(fingerprint, job_description)
+        else:
+            job_description = "No response received from the model."
+
+    return job_description, False, completion
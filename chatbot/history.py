@@ -0,0 +1,123 @@
+"""
+Set-based housekeeping for Past rows: date-range filters, bulk deletes, the
+batched retention purge behind `manage.py purge_history`, and the per-user
+HistoryVersion that keys the cached history pages.
+"""
+import time as _time
+from datetime import datetime, time, timedelta
+
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Draft, GenerationJob, HistoryVersion, Past, PastSignature, SimilarityBucket
+from .search import FTS_TABLE
+
+
+def current_version(user_id):
+    """
+    (version, changed_at) of the user's history; (0, None) before the first change.
+    """
+    row = HistoryVersion.objects.filter(user_id=user_id).values_list("version", "changed_at").first()
+    return row or (0, None)
+
+
+def _bump(user_ids):
+    user_ids = set(user_ids)
+    now = timezone.now()
+    updated = HistoryVersion.objects.filter(user_id__in=user_ids).update(
+        version=F("version") + 1, changed_at=now
+    )
+    if updated < len(user_ids):
+        existing = set(
+            HistoryVersion.objects.filter(user_id__in=user_ids).values_list("user_id", flat=True)
+        )
+        HistoryVersion.objects.bulk_create(
+            [HistoryVersion(user_id=uid, version=1, changed_at=now) for uid in user_ids - existing],
+            ignore_conflicts=True,
+        )
+
+
+def touch(user_id):
+    """
+    Record that the user's history changed, so cached pages and ETags go stale.
+    """
+    if user_id is not None:
+        _bump([user_id])
+
+
+def in_date_range(rows, start=None, end=None):
+    """
+    Limit rows to local dates start..end, both inclusive. Comparing against
+    datetimes rather than created_at__date keeps the (user, created_at) index usable.
+    """
+    if start:
+        rows = rows.filter(created_at__gte=timezone.make_aware(datetime.combine(start, time.min)))
+    if end:
+        rows = rows.filter(
+            created_at__lt=timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min))
+        )
+    return rows
+
+
+def delete_rows(rows):
+    """
+    Delete a Past queryset with a fixed number of statements however many rows
+    match. Rows pointing at the deleted ones are cleared or deleted by subquery,
+    the Past rows go in one raw DELETE (the FTS triggers still fire), and each
+    owner's history version is bumped once. No post_delete signals are sent.
+    Returns the number of Past rows deleted.
+    """
+    ids = rows.values("pk")
+    with transaction.atomic():
+        user_ids = set(rows.values_list("user_id", flat=True).distinct())
+        SimilarityBucket.objects.filter(signature__in=ids)._raw_delete(SimilarityBucket.objects.db)
+        PastSignature.objects.filter(past__in=ids)._raw_delete(PastSignature.objects.db)
+        GenerationJob.objects.filter(past__in=ids).update(past=None)
+        Draft.objects.filter(promoted__in=ids).update(promoted=None)
+        Past.objects.filter(revision_of__in=ids).update(revision_of=None)
+        deleted = Past.objects.filter(pk__in=ids)._raw_delete(Past.objects.db)
+        if deleted:
+            _bump(user_ids)
+    return deleted
+
+
+def purge_older_than(cutoff, batch_size=500, pause=0.0):
+    """
+    Delete every Past row created before `cutoff`, oldest first, in transactions
+    of at most `batch_size` rows so that writers are never blocked for long.
+    Yields the running total after each batch.
+    """
+    total = 0
+    while True:
+        ids = list(
+            Past.objects.filter(created_at__lt=cutoff)
+            .order_by("created_at", "pk")
+            .values_list("pk", flat=True)[:batch_size]
+        )
+        if not ids:
+            return
+        with transaction.atomic():
+            total += delete_rows(Past.objects.filter(pk__in=ids))
+        yield total
+        if pause:
+            _time.sleep(pause)
+
+
+def compact():
+    """
+    Give the space freed by a purge back to the filesystem and refresh the
+    planner statistics. Returns False on databases where this is not supported.
+    """
+    if connection.vendor == "sqlite":
+        with connection.cursor() as cursor:
+            # Merge the FTS segments left behind by the delete triggers first
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES('optimize')")
+            cursor.execute("VACUUM")
+            cursor.execute("ANALYZE")
+        return True
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute(f"VACUUM ANALYZE {Past._meta.db_table}")
+        return True
+    return False
@@ -0,0 +1,129 @@
+"""
+DB-backed generation queue processed by `manage.py jd_worker`.
+
+Workers claim a job by atomically moving it to RUNNING with a lease. A job whose
+lease runs out (the worker died or hung) becomes claimable again, and failed
+attempts are retried with exponential backoff until max_attempts is reached.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .generation import GENERATION_FAILED_MESSAGE, generate_job_description, question_for_history
+from .models import GenerationJob, Past
+
+logger = logging.getLogger(__name__)
+
+# Shown by job_status; the exception itself is only logged
+
+
+def enqueue(user, form, force_regenerate=False):
+    return GenerationJob.objects.create(
+        user=user,
+        form=form,
+        force_regenerate=force_regenerate,
+        max_attempts=getattr(settings, "JD_JOB_MAX_ATTEMPTS", 3),
+    )
+
+
+def _claimable(now):
+    return Q(status=GenerationJob.QUEUED, available_at__lte=now) | Q(
+        status=GenerationJob.RUNNING,
+        lease_expires_at__lt=now,
+        attempts__lt=F("max_attempts"),
+    )
+
+
+def fail_abandoned(now=None):
+    """
+    Give up on running jobs whose lease expired after their last allowed attempt.
+    """
+    now = now or timezone.now()
+    return GenerationJob.objects.filter(
+        status=GenerationJob.RUNNING,
+        lease_expires_at__lt=now,
+        attempts__gte=F("max_attempts"),
+    ).update(
+        status=GenerationJob.FAILED,
+        error="Worker lease expired before the job finished.",
+        finished_at=now,
+    )
+
+
+def claim_next(worker_id, lease_seconds):
+    """
+    Lease the oldest claimable job to this worker, or return None.
+
+    The conditional UPDATE only succeeds for one worker, so concurrent workers
+    never process the same job at the same time.
+    """
+    now = timezone.now()
+    candidates = GenerationJob.objects.filter(_claimable(now)).order_by("created_at")
+
+    for job_id in candidates.values_list("pk", flat=True)[:10]:
+        claimed = GenerationJob.objects.filter(_claimable(now), pk=job_id).update(
+            status=GenerationJob.RUNNING,
+            worker_id=worker_id,
+            lease_expires_at=now + timedelta(seconds=lease_seconds),
+            attempts=F("attempts") + 1,
+        )
+        if claimed:
+            return GenerationJob.objects.get(pk=job_id)
+
+    return None
+
+
+def process(job):
+    """
+    Run one leased job; returns True when it finished successfully.
+    """
+    owned = GenerationJob.objects.filter(
+        pk=job.pk, status=GenerationJob.RUNNING, worker_id=job.worker_id
+    )
+
+    try:
+        job_description, _, completion = generate_job_description(
+            job.form, job.force_regenerate, user_id=job.user_id
+        )
+    except Exception:
+        logger.exception("Generation job %s failed on attempt %s", job.pk, job.attempts)
+        now = timezone.now()
+        if job.attempts >= job.max_attempts:
+            owned.update(
+                status=GenerationJob.FAILED,
+                error=GENERATION_FAILED_MESSAGE,
+                finished_at=now,
+            )
+        else:
+            owned.update(
+                status=GenerationJob.QUEUED,
+                error=GENERATION_FAILED_MESSAGE,
+                lease_expires_at=None,
+                available_at=now + timedelta(seconds=2 ** job.attempts),
+            )
+        return False
+
+    with transaction.atomic():
+        past = Past.objects.create(
+            question=question_for_history(job.form),
+            answer=job_description,
+            user_id=job.user_id,
+            **(completion.past_fields() if completion else {}),
+        )
+        finished = owned.update(
+            status=GenerationJob.DONE,
+            result=job_description,
+            error="",
+            past=past,
+            finished_at=timezone.now(),
+        )
+        if not finished:
+            # The lease ran out and another worker owns the job now
+            transaction.set_rollback(True)
+            return False
+
+    return True
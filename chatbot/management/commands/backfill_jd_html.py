@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from chatbot.models import Past
+from chatbot.utils import RENDERER_VERSION
+
+
+class Command(BaseCommand):
+    help = "Render answer_html for Past rows written by an older (or no) renderer version."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Rows fetched and updated per query.",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        stale = (
+            Past.objects.exclude(html_version=RENDERER_VERSION)
+            .only("id", "answer")
+            .order_by("pk")
+        )
+
+        updated = 0
+        batch = []
+        for past in stale.iterator(chunk_size=batch_size):
+            batch.append(past.render_html())
+            if len(batch) >= batch_size:
+                updated += Past.objects.bulk_update(batch, ["answer_html", "html_version"])
+                batch = []
+
+        if batch:
+            updated += Past.objects.bulk_update(batch, ["answer_html", "html_version"])
+
+        self.stdout.write(f"Re-rendered {updated} job descriptions (renderer v{RENDERER_VERSION})")
@@ -0,0 +1,51 @@
+import os
+import socket
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from chatbot import batch as batches
+
+
+class Command(BaseCommand):
+    help = "Generate job descriptions for uploaded batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=getattr(settings, "JD_BATCH_CONCURRENCY", 8),
+            help="Maximum OpenAI calls in flight per batch.",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=2.0,
+            help="Seconds to wait before polling again when no batch is pending.",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit once no batch is pending instead of polling forever.",
+        )
+
+    def handle(self, *args, **options):
+        worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        while True:
+            close_old_connections()
+            batch = batches.claim_pending_batch(worker_id)
+
+            if batch is None:
+                if options["once"]:
+                    return
+                time.sleep(options["poll_interval"])
+                continue
+
+            started = time.monotonic()
+            batch = batches.run_batch(batch, concurrency=options["concurrency"])
+            self.stdout.write(
+                f"Batch {batch.pk}: {batch.completed} done, {batch.failed} failed, {batch.skipped} skipped "
+                f"in {time.monotonic() - started:.1f}s"
+            )
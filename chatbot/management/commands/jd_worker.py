@@ -0,0 +1,92 @@
+import os
+import signal
+import socket
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+
+from chatbot import jobs
+
+
+class Command(BaseCommand):
+    help = "Process queued job description generations with a pool of worker threads."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=getattr(settings, "JD_WORKER_CONCURRENCY", 4),
+            help="Number of jobs processed at the same time.",
+        )
+        parser.add_argument(
+            "--lease",
+            type=int,
+            default=getattr(settings, "JD_JOB_LEASE_SECONDS", 120),
+            help="Seconds a claimed job stays invisible to other workers.",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=1.0,
+            help="Seconds to wait before polling again when the queue is empty.",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit once the queue is empty instead of polling forever.",
+        )
+
+    def handle(self, *args, **options):
+        self.stop = threading.Event()
+        signal.signal(signal.SIGTERM, lambda *_: self.stop.set())
+
+        prefix = f"{socket.gethostname()}:{os.getpid()}"
+        if options["concurrency"] == 1:
+            self.stdout.write(f"Starting 1 job worker ({prefix})")
+            self.run_worker(f"{prefix}:0", options)
+            self.stdout.write("Job workers stopped")
+            return
+
+        threads = [
+            threading.Thread(
+                target=self.run_worker,
+                args=(f"{prefix}:{index}", options),
+                daemon=True,
+            )
+            for index in range(options["concurrency"])
+        ]
+
+        self.stdout.write(f"Starting {len(threads)} job workers ({prefix})")
+        for thread in threads:
+            thread.start()
+
+        try:
+            for thread in threads:
+                while thread.is_alive():
+                    thread.join(timeout=0.5)
+        except KeyboardInterrupt:
+            self.stop.set()
+            for thread in threads:
+                thread.join()
+
+        self.stdout.write("Job workers stopped")
+
+    def run_worker(self, worker_id, options):
+        try:
+            while not self.stop.is_set():
+                close_old_connections()
+                jobs.fail_abandoned()
+                job = jobs.claim_next(worker_id, options["lease"])
+
+                if job is None:
+                    if options["once"]:
+                        break
+                    self.stop.wait(options["poll_interval"])
+                    continue
+
+                ok = jobs.process(job)
+                self.stdout.write(f"[{worker_id}] job {job.pk} {'done' if ok else 'failed'}")
+        finally:
+            connection.close()
@@ -0,0 +1,56 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from chatbot import history
+
+
+class Command(BaseCommand):
+    help = "Delete Past rows older than a number of days, in small batches, then compact the database."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than",
+            type=int,
+            required=True,
+            metavar="DAYS",
+            help="Delete job descriptions created more than this many days ago.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Rows deleted per transaction.",
+        )
+        parser.add_argument(
+            "--pause",
+            type=float,
+            default=0.0,
+            help="Seconds to sleep between batches, to leave room for other writers.",
+        )
+        parser.add_argument(
+            "--no-vacuum",
+            action="store_true",
+            help="Skip VACUUM/ANALYZE after the purge.",
+        )
+
+    def handle(self, *args, **options):
+        if options["older_than"] < 1:
+            raise CommandError("--older-than must be at least 1 day.")
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be positive.")
+
+        cutoff = timezone.now() - timedelta(days=options["older_than"])
+        deleted = 0
+        for deleted in history.purge_older_than(cutoff, options["batch_size"], options["pause"]):
+            if options["verbosity"] > 1:
+                self.stdout.write(f"  {deleted} deleted so far")
+
+        self.stdout.write(f"Deleted {deleted} job descriptions created before {cutoff:%Y-%m-%d %H:%M}")
+
+        if deleted and not options["no_vacuum"]:
+            if history.compact():
+                self.stdout.write("Vacuumed and analyzed the database")
+            else:
+                self.stdout.write("Skipped VACUUM/ANALYZE: not supported on this database")
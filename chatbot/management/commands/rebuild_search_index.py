@@ -0,0 +1,18 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from chatbot.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search index over Past questions and answers."
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        started = time.monotonic()
+        indexed = backend.rebuild()
+        self.stdout.write(
+            f"Indexed {indexed} rows with {type(backend).__name__} "
+            f"in {time.monotonic() - started:.1f}s"
+        )
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from chatbot import similarity
+from chatbot.models import Past, PastSignature
+
+
+class Command(BaseCommand):
+    help = "Rebuild the near-duplicate (MinHash/LSH) index over Past inputs."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Rows indexed per bulk insert.",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        PastSignature.objects.all().delete()
+
+        indexed = 0
+        batch = []
+        rows = Past.objects.filter(user__isnull=False).only("id", "user_id", "question").order_by("pk")
+        for past in rows.iterator(chunk_size=batch_size):
+            batch.append(past)
+            if len(batch) >= batch_size:
+                with transaction.atomic():
+                    similarity.index_pasts(batch)
+                indexed += len(batch)
+                batch = []
+
+        if batch:
+            with transaction.atomic():
+                similarity.index_pasts(batch)
+            indexed += len(batch)
+
+        self.stdout.write(f"Indexed {indexed} job descriptions for similarity lookups")
@@ -0,0 +1,91 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from chatbot import routing
+from chatbot.models import Past
+
+COLUMNS = (
+    ("route", "{:<24}"),
+    ("model", "{:<16}"),
+    ("count", "{:>6}"),
+    ("p50 ms", "{:>8}"),
+    ("p95 ms", "{:>8}"),
+    ("Δp50 ms", "{:>8}"),
+    ("prompt", "{:>7}"),
+    ("compl.", "{:>7}"),
+    ("max_tok", "{:>8}"),
+    ("Δtokens", "{:>8}"),
+    ("trunc.", "{:>7}"),
+)
+
+
+def _mean(values):
+    return round(sum(values) / len(values)) if values else "-"
+
+
+class Command(BaseCommand):
+    help = "Summarise latency and token usage per routing rule from the recorded generations."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=30,
+            help="Only include generations from the last DAYS days.",
+        )
+
+    def handle(self, *args, **options):
+        if options["days"] < 1:
+            raise CommandError("--days must be at least 1.")
+
+        since = timezone.now() - timedelta(days=options["days"])
+        rows = (
+            Past.objects.filter(created_at__gte=since)
+            .exclude(model="")
+            .values_list("route", "model", "max_tokens", "prompt_tokens",
+                         "completion_tokens", "latency_ms", "truncated")
+        )
+        groups = {}
+        for route, model, *usage in rows.iterator():
+            groups.setdefault((route, model), []).append(usage)
+
+        if not groups:
+            self.stdout.write(f"No recorded generations in the last {options['days']} days.")
+            return
+
+        def p50(samples):
+            latencies = [latency for *_, latency, _ in samples if latency is not None]
+            return routing.percentile(latencies, 0.5) if latencies else None
+
+        baseline = [
+            sample for (route, _), samples in groups.items()
+            if route == "default" for sample in samples
+        ]
+        baseline_p50 = p50(baseline) if baseline else None
+
+        def mean_tokens(samples):
+            return sum(prompt + completion for _, prompt, completion, *_ in samples) / len(samples)
+
+        baseline_tokens = mean_tokens(baseline) if baseline else None
+
+        template = " ".join(fmt for _, fmt in COLUMNS)
+        self.stdout.write(template.format(*(name for name, _ in COLUMNS)))
+        for (route, model), samples in sorted(groups.items()):
+            latencies = [latency for *_, latency, _ in samples if latency is not None]
+            ceilings = [max_tokens for max_tokens, *_ in samples if max_tokens]
+            median = p50(samples)
+            self.stdout.write(template.format(
+                route,
+                model,
+                len(samples),
+                median if median is not None else "-",
+                routing.percentile(latencies, 0.95) if latencies else "-",
+                f"{median - baseline_p50:+d}" if None not in (median, baseline_p50) else "-",
+                _mean([prompt for _, prompt, *_ in samples]),
+                _mean([completion for _, _, completion, *_ in samples]),
+                _mean(ceilings),
+                f"{round(mean_tokens(samples) - baseline_tokens):+d}" if baseline_tokens is not None else "-",
+                f"{sum(1 for *_, truncated in samples if truncated) / len(samples):.1%}",
+            ))
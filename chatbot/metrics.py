@@ -0,0 +1,181 @@
+"""
+Prometheus metrics for request latency, OpenAI latency and token usage.
+
+Under gunicorn every worker is a separate process, so the metrics are kept in
+prometheus_client's multiprocess mode: when PROMETHEUS_MULTIPROC_DIR is set
+(chatgpt/gunicorn_metrics.py sets it before the workers start) each process
+writes its samples to mmap'd files in that directory and /metrics sums them.
+Without it, e.g. under runserver, the in-process registry is used; under
+gunicorn that would make every scrape report a single worker's counts, so
+check_multiprocess() refuses to start a gunicorn worker without it.
+"""
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.core.exceptions import ImproperlyConfigured
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+REQUEST_LATENCY = Histogram(
+    "jd_http_request_duration_seconds",
+    "Time until a view returned its response.",
+    ["view", "method", "status"],
+)
+REQUEST_DB_QUERIES = Histogram(
+    "jd_http_request_db_queries",
+    "Database queries executed per request.",
+    ["view"],
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 200, float("inf")),
+)
+REQUEST_EXCEPTIONS = Counter(
+    "jd_http_request_exceptions_total",
+    "Unhandled exceptions raised by views.",
+    ["view", "exception"],
+)
+OPENAI_LATENCY = Histogram(
+    "jd_openai_request_duration_seconds",
+    "OpenAI chat completion latency per attempt; for streams, until the response starts.",
+    ["model", "operation"],
+    buckets=(0.25, 0.5, 1, 2, 4, 8, 15, 30, 60, 120, float("inf")),
+)
+OPENAI_ERRORS = Counter(
+    "jd_openai_errors_total",
+    "Failed OpenAI calls by exception type.",
+    ["model", "operation", "exception"],
+)
+OPENAI_RETRIES = Counter(
+    "jd_openai_retries_total",
+    "OpenAI attempts retried after a transient failure.",
+    ["model"],
+)
+OPENAI_HEDGES = Counter(
+    "jd_openai_hedged_requests_total",
+    "Second attempts started because the first was slower than p95.",
+    ["model"],
+)
+OPENAI_BREAKER_REJECTIONS = Counter(
+    "jd_openai_breaker_rejections_total",
+    "Calls refused without contacting OpenAI because the circuit breaker was open.",
+    ["model"],
+)
+SINGLEFLIGHT = Counter(
+    "jd_singleflight_total",
+    "Generations by single-flight role: leader, shared (waited for a leader's answer), "
+    "takeover (the leader gave up or died) and timeout (stopped waiting).",
+    ["outcome"],
+)
+RESPONSE_CACHE_LOOKUPS = Counter(
+    "jd_response_cache_lookups_total",
+    "Response cache lookups by result: hit or miss.",
+    ["result"],
+)
+OPENAI_TOKENS = Counter(
+    "jd_openai_tokens_total",
+    "Tokens reported in OpenAI usage.",
+    ["model", "kind"],
+)
+
+# Per-request query counter; a context variable so sync_to_async threads share it
+_query_count = ContextVar("jd_query_count", default=None)
+
+
+def count_query(execute, sql, params, many, context):
+    counter = _query_count.get()
+    if counter is not None:
+        counter[0] += 1
+    return execute(sql, params, many, context)
+
+
+def install_query_counter(sender, connection, **kwargs):
+    """
+    connection_created receiver: count every query run on the new connection.
+    """
+    if count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_query)
+
+
+def start_query_count():
+    return _query_count.set([0])
+
+
+def finish_query_count(token):
+    queries = _query_count.get()[0]
+    _query_count.reset(token)
+    return queries
+
+
+@contextmanager
+def track_openai(model, operation="chat"):
+    """
+    Time an OpenAI call and count its failures by exception type.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        OPENAI_ERRORS.labels(model, operation, type(e).__name__).inc()
+        raise
+    finally:
+        OPENAI_LATENCY.labels(model, operation).observe(time.perf_counter() - start)
+
+
+def record_tokens(model, prompt_tokens, completion_tokens):
+    if prompt_tokens:
+        OPENAI_TOKENS.labels(model, "prompt").inc(prompt_tokens)
+    if completion_tokens:
+        OPENAI_TOKENS.labels(model, "completion").inc(completion_tokens)
+
+
+def check_multiprocess():
+    """
+    Raise ImproperlyConfigured in a gunicorn worker without PROMETHEUS_MULTIPROC_DIR.
+    """
+    if os.environ.get("SERVER_SOFTWARE", "").startswith("gunicorn") and not os.environ.get(
+        "PROMETHEUS_MULTIPROC_DIR"
+    ):
+        raise ImproperlyConfigured(
+            "PROMETHEUS_MULTIPROC_DIR is not set, so each gunicorn worker would keep its own "
+            "metrics. Start gunicorn with gunicorn.conf.py or gunicorn_asgi.conf.py, or set it "
+            "to an empty directory shared by the workers."
+        )
+
+
+def _registry():
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+
+def render_latest():
+    """
+    Return (body, content_type) in the Prometheus text format.
+    """
+    return generate_latest(_registry()), CONTENT_TYPE_LATEST
+
+
+def counter_totals(counter, label):
+    """
+    {label value: count} of a counter with one label, summed over all worker
+    processes in multiprocess mode.
+    """
+    name = counter._name
+    totals = {}
+    for metric in _registry().collect():
+        if metric.name != name:
+            continue
+        for sample in metric.samples:
+            if sample.name == f"{name}_total":
+                value = sample.labels[label]
+                totals[value] = totals.get(value, 0) + sample.value
+    return totals
@@ -0,0 +1,62 @@
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from . import metrics
+
+
+def view_label(request):
+    match = getattr(request, "resolver_match", None)
+    # Unmatched URLs share one label so scanners cannot blow up the series count
+    return match.view_name if match else "<unresolved>"
+
+
+class MetricsMiddleware:
+    """
+    Record latency and database query count for every request.
+
+    Streaming responses are timed until their headers are returned; the OpenAI
+    latency histogram covers the stream itself.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        start = time.perf_counter()
+        token = metrics.start_query_count()
+        try:
+            response = self.get_response(request)
+        finally:
+            queries = metrics.finish_query_count(token)
+        self.observe(request, response, start, queries)
+        return response
+
+    async def __acall__(self, request):
+        start = time.perf_counter()
+        token = metrics.start_query_count()
+        try:
+            response = await self.get_response(request)
+        finally:
+            queries = metrics.finish_query_count(token)
+        self.observe(request, response, start, queries)
+        return response
+
+    @staticmethod
+    def observe(request, response, start, queries):
+        view = view_label(request)
+        metrics.REQUEST_LATENCY.labels(view, request.method, response.status_code).observe(
+            time.perf_counter() - start
+        )
+        metrics.REQUEST_DB_QUERIES.labels(view).observe(queries)
+
+    def process_exception(self, request, exception):
+        metrics.REQUEST_EXCEPTIONS.labels(view_label(request), type(exception).__name__).inc()
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.25 on 2026-10-17 23:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chatbot', '0007_generationbatch'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='past',
+            name='answer_html',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='past',
+            name='html_version',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+    ]
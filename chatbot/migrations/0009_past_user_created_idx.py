@@ -0,0 +1,17 @@
+# Generated by Django 4.2.25 on 2026-10-17 23:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chatbot', '0008_past_answer_html'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='past',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='past_user_created_idx'),
+        ),
+    ]
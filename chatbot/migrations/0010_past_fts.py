@@ -0,0 +1,62 @@
+from django.db import migrations
+
+FTS_TABLE = "chatbot_past_fts"
+
+CREATE_SQL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        question, answer,
+        content='chatbot_past', content_rowid='id',
+        tokenize='porter unicode61'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS chatbot_past_fts_ai AFTER INSERT ON chatbot_past BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, question, answer)
+        VALUES (new.id, new.question, new.answer);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS chatbot_past_fts_ad AFTER DELETE ON chatbot_past BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, question, answer)
+        VALUES ('delete', old.id, old.question, old.answer);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS chatbot_past_fts_au AFTER UPDATE OF question, answer ON chatbot_past BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, question, answer)
+        VALUES ('delete', old.id, old.question, old.answer);
+        INSERT INTO {FTS_TABLE}(rowid, question, answer)
+        VALUES (new.id, new.question, new.answer);
+    END
+    """,
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES('rebuild')",
+]
+
+DROP_SQL = [
+    "DROP TRIGGER IF EXISTS chatbot_past_fts_au",
+    "DROP TRIGGER IF EXISTS chatbot_past_fts_ad",
+    "DROP TRIGGER IF EXISTS chatbot_past_fts_ai",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+
+def _run(statements):
+    def run(apps, schema_editor):
+        # FTS5 is SQLite only; other databases use a different search backend
+        if schema_editor.connection.vendor != "sqlite":
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chatbot', '0009_past_user_created_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(_run(CREATE_SQL), _run(DROP_SQL)),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 4.2.25 on 2026-10-17 23:49
+
+from importlib import import_module
+
+from django.db import migrations, models
+
+# SQLite adds these columns by rebuilding chatbot_past, which drops the search
+# index triggers from 0010; put them back (and resync the index) afterwards.
+past_fts = import_module("chatbot.migrations.0010_past_fts")
+restore_fts = past_fts._run(past_fts.CREATE_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chatbot', '0013_historyversion'),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, restore_fts),
+        migrations.AddField(
+            model_name='past',
+            name='completion_tokens',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='past',
+            name='latency_ms',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='past',
+            name='max_tokens',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='past',
+            name='model',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='past',
+            name='prompt_tokens',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='past',
+            name='route',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='past',
+            name='truncated',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(restore_fts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.25 on 2026-10-17 23:56
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chatbot', '0014_past_usage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GenerationLease',
+            fields=[
+                ('fingerprint', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('owner', models.CharField(max_length=32)),
+                ('started_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('expires_at', models.DateTimeField()),
+            ],
+        ),
+    ]
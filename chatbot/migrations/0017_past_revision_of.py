@@ -0,0 +1,27 @@
+# Generated by Django 4.2.25 on 2026-10-18 00:05
+
+from importlib import import_module
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Adding a nullable column is a plain ALTER TABLE on SQLite, but removing it
+# rebuilds chatbot_past and drops the search index triggers from 0010
+past_fts = import_module("chatbot.migrations.0010_past_fts")
+restore_fts = past_fts._run(past_fts.CREATE_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chatbot', '0016_draft'),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, restore_fts),
+        migrations.AddField(
+            model_name='past',
+            name='revision_of',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='revisions', to='chatbot.past'),
+        ),
+    ]
@@ -1,19 +1,64 @@
 from django.db import models
-from django.contrib.auth.models import User
+from django.contrib.auth.models import Group, User
 from django.utils import timezone
+from django.utils.safestring import mark_safe
+from .utils import RENDERER_VERSION, render_job_description
 
 
 class Past(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
     question = models.CharField(max_length=250)
     answer = models.TextField(max_length=5000)
+    # answer rendered by render_job_description at write time
+    answer_html = models.TextField(blank=True)
+    html_version = models.PositiveSmallIntegerField(default=0)
     created_at = models.DateTimeField(default=timezone.now)
+    # How the answer was generated (chatbot.routing); left empty for answers
+    # served from the response cache
+    model = models.CharField(max_length=100, blank=True)
+    route = models.CharField(max_length=100, blank=True)
+    max_tokens = models.PositiveIntegerField(null=True, blank=True)
+    prompt_tokens = models.PositiveIntegerField(default=0)
+    completion_tokens = models.PositiveIntegerField(default=0)
+    latency_ms = models.PositiveIntegerField(null=True, blank=True)
+    truncated = models.BooleanField(default=False)
+    # The row this one was made from by regenerating one section (chatbot.sections)
+    revision_of = models.ForeignKey(
+        'self', on_delete=models.SET_NULL, null=True, blank=True, related_name='revisions'
+    )
 
     def __str__(self):
         return self.question
 
+    def render_html(self):
+        self.answer_html = render_job_description(self.answer)
+        self.html_version = RENDERER_VERSION
+        return self
+
+    @property
+    def html(self):
+        """
+        Stored HTML, or a fresh render for rows written by an older renderer.
+        """
+        if self.html_version == RENDERER_VERSION:
+            return mark_safe(self.answer_html)
+        return render_job_description(self.answer)
+
+    def save(self, *args, **kwargs):
+        # Render once here so list pages never run the renderer per view
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or "answer" in update_fields:
+            self.render_html()
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "answer_html", "html_version"}
+        super().save(*args, **kwargs)
+
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Serves the history page's keyset pagination (chatbot.pagination)
+            models.Index(fields=['user', '-created_at', '-id'], name='past_user_created_idx'),
+        ]
 
 
 # Extended user profile with security question
@@ -32,3 +77,217 @@ class UserProfile(models.Model):
 
     def __str__(self):
         return f"{self.user.username}'s Profile"
+
+
+# Cached OpenAI answers keyed by a fingerprint of the prompt inputs and model params
+class CachedResponse(models.Model):
+    fingerprint = models.CharField(max_length=64, unique=True)
+    answer = models.TextField()
+    created_at = models.DateTimeField(default=timezone.now)
+    last_used_at = models.DateTimeField(default=timezone.now, db_index=True)
+    hit_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return self.fingerprint
+
+
+# One of several candidate answers from a multi-variant generation; the one the
+# user picks is promoted to Past, the others stay here (chatbot.drafts)
+class Draft(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    # Shared by the variants of one request
+    group = models.UUIDField(db_index=True)
+    position = models.PositiveSmallIntegerField()
+    question = models.TextField()
+    answer = models.TextField()
+    # Past usage fields for this variant, see generation.usage_fields
+    usage = models.JSONField(default=dict, blank=True)
+    promoted = models.ForeignKey(Past, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    created_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"Draft {self.position} of {self.group}"
+
+    @property
+    def html(self):
+        return render_job_description(self.answer)
+
+    class Meta:
+        ordering = ['group', 'position']
+
+
+# Lease held while one process generates the answer for a fingerprint; identical
+# requests wait for that answer instead of calling OpenAI (chatbot.singleflight)
+class GenerationLease(models.Model):
+    fingerprint = models.CharField(max_length=64, primary_key=True)
+    owner = models.CharField(max_length=32)
+    started_at = models.DateTimeField(default=timezone.now)
+    expires_at = models.DateTimeField()
+
+    def __str__(self):
+        return self.fingerprint
+
+
+# Generation request waiting for (or processed by) the jd_worker command
+class GenerationJob(models.Model):
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    form = models.JSONField()
+    force_regenerate = models.BooleanField(default=False)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    available_at = models.DateTimeField(default=timezone.now)
+    lease_expires_at = models.DateTimeField(null=True, blank=True)
+    worker_id = models.CharField(max_length=100, blank=True)
+    result = models.TextField(blank=True)
+    error = models.TextField(blank=True)
+    past = models.ForeignKey(Past, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Job {self.pk} ({self.status})"
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'available_at'])]
+
+
+# Bulk upload of many generation requests, processed by the jd_batch command
+class GenerationBatch(models.Model):
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    name = models.CharField(max_length=250)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    total = models.PositiveIntegerField(default=0)
+    completed = models.PositiveIntegerField(default=0)
+    failed = models.PositiveIntegerField(default=0)
+    # Rows not generated because the user's daily token budget ran out
+    skipped = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(default=timezone.now)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    # Renewed by the running jd_batch process; an expired lease lets another one resume
+    lease_expires_at = models.DateTimeField(null=True, blank=True)
+    worker_id = models.CharField(max_length=100, blank=True)
+
+    def __str__(self):
+        return self.name
+
+    @property
+    def progress(self):
+        if not self.total:
+            return 100
+        return round(100 * (self.completed + self.failed + self.skipped) / self.total)
+
+    class Meta:
+        ordering = ['-created_at']
+
+
+class BatchItem(models.Model):
+    PENDING = 'pending'
+    DONE = 'done'
+    FAILED = 'failed'
+    SKIPPED = 'skipped'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+        (SKIPPED, 'Skipped'),
+    ]
+
+    batch = models.ForeignKey(GenerationBatch, on_delete=models.CASCADE, related_name='items')
+    position = models.PositiveIntegerField()
+    form = models.JSONField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    result = models.TextField(blank=True)
+    error = models.TextField(blank=True)
+
+    def __str__(self):
+        return f"{self.batch} #{self.position}"
+
+    class Meta:
+        ordering = ['position']
+
+
+# MinHash signature of a Past row's inputs (chatbot.similarity)
+class PastSignature(models.Model):
+    past = models.OneToOneField(Past, on_delete=models.CASCADE, primary_key=True, related_name='signature')
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    minhash = models.BinaryField()
+
+
+# One LSH band bucket of a signature; rows sharing a bucket are candidate near-duplicates
+class SimilarityBucket(models.Model):
+    signature = models.ForeignKey(PastSignature, on_delete=models.CASCADE, related_name='buckets')
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    # Hash of (band number, band values), see similarity.band_buckets
+    bucket = models.BigIntegerField()
+
+    class Meta:
+        indexes = [models.Index(fields=['user', 'bucket'], name='similarity_bucket_idx')]
+
+
+# OpenAI tokens used per user per day (chatbot.ratelimit)
+class DailyTokenUsage(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    day = models.DateField()
+    tokens = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.user} {self.day}: {self.tokens}"
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['user', 'day'], name='unique_daily_token_usage')]
+
+
+# Requests-per-minute token bucket, shared by all worker processes
+class RateLimitBucket(models.Model):
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True)
+    tokens = models.FloatField()
+    updated_at = models.FloatField()
+
+
+# Admin-editable limits for one user or one group; empty fields inherit from settings
+class UsageLimit(models.Model):
+    user = models.OneToOneField(User, on_delete=models.CASCADE, null=True, blank=True)
+    group = models.OneToOneField(Group, on_delete=models.CASCADE, null=True, blank=True)
+    requests_per_minute = models.PositiveIntegerField(null=True, blank=True)
+    tokens_per_day = models.PositiveIntegerField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Limits for {self.user or self.group}"
+
+    class Meta:
+        constraints = [
+            models.CheckConstraint(
+                check=models.Q(user__isnull=False, group__isnull=True)
+                | models.Q(user__isnull=True, group__isnull=False),
+                name='usage_limit_user_or_group',
+            )
+        ]
+
+
+# Bumped whenever a user's history changes; keys the cached history pages and
+# their ETag (chatbot.history)
+class HistoryVersion(models.Model):
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True)
+    version = models.PositiveBigIntegerField(default=0)
+    changed_at = models.DateTimeField(default=timezone.now)
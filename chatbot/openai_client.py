@@ -0,0 +1,105 @@
+"""
+Process-wide OpenAI clients, built on first use.
+
+Nothing is created at import time, so manage.py commands such as migrate and
+collectstatic work without OPENAI_API_KEY. The sync client keeps one pooled
+httpx connection pool per process, so consecutive generations reuse a warm
+TLS connection. A process forked from one that already built the client
+(e.g. gunicorn --preload) builds its own, because sockets and locks must not
+be shared across processes. Async clients are kept per event loop, since an
+httpx async pool is bound to the loop that opened it.
+"""
+import asyncio
+import os
+import threading
+import weakref
+
+import httpx
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient, DefaultHttpxClient, OpenAI
+
+_lock = threading.Lock()
+_client = None
+_client_pid = None
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def _options():
+    api_key = getattr(settings, "OPENAI_API_KEY", "")
+    if not api_key:
+        raise ImproperlyConfigured(
+            "OPENAI_API_KEY is not set. Ensure .env is next to manage.py and is loaded."
+        )
+    return {
+        "api_key": api_key,
+        # Retries and per-call timeouts are handled by chatbot.resilience
+        "max_retries": 0,
+        "timeout": getattr(settings, "JD_OPENAI_TIMEOUT", 30),
+    }
+
+
+def _transport_options():
+    return {
+        "limits": httpx.Limits(
+            max_connections=getattr(settings, "JD_OPENAI_MAX_CONNECTIONS", 100),
+            max_keepalive_connections=getattr(settings, "JD_OPENAI_MAX_KEEPALIVE", 20),
+            keepalive_expiry=getattr(settings, "JD_OPENAI_KEEPALIVE_EXPIRY", 60),
+        ),
+        # Needs the h2 package (pip install "httpx[http2]")
+        "http2": getattr(settings, "JD_OPENAI_HTTP2", False),
+    }
+
+
+def get_client():
+    """
+    The sync OpenAI client for this process.
+    """
+    global _client, _client_pid
+    pid = os.getpid()
+    if _client is None or _client_pid != pid:
+        with _lock:
+            if _client is None or _client_pid != pid:
+                _client = OpenAI(
+                    http_client=DefaultHttpxClient(**_transport_options()), **_options()
+                )
+                _client_pid = pid
+    return _client
+
+
+def get_async_client():
+    """
+    The async OpenAI client for the running event loop.
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = AsyncOpenAI(
+            http_client=DefaultAsyncHttpxClient(**_transport_options()), **_options()
+        )
+        _async_clients[loop] = client
+    return client
+
+
+def reset():
+    """
+    Drop the cached clients so the next call builds new ones with current settings.
+    """
+    global _client, _client_pid
+    with _lock:
+        _client = None
+        _client_pid = None
+        _async_clients.clear()
+
+
+def _after_fork_in_child():
+    global _lock, _client, _client_pid
+    # The parent's lock may have been held by another thread at fork time
+    _lock = threading.Lock()
+    _client = None
+    _client_pid = None
+    _async_clients.clear()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
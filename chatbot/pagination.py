@@ -0,0 +1,81 @@
+"""
+Keyset (cursor) pagination over (-created_at, -id).
+
+Each page is fetched with a WHERE on the last row of the previous page instead
+of an OFFSET, so page N costs the same index range scan as page 1 and no
+COUNT(*) is needed.
+"""
+import base64
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from django.db.models import Q
+
+
+def encode_cursor(obj):
+    raw = f"{obj.created_at.isoformat()}|{obj.pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """
+    Return (created_at, pk) for a cursor, or None if it is missing or malformed.
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, pk = base64.urlsafe_b64decode(padded).decode().rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(pk)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+@dataclass
+class KeysetPage:
+    items: list = field(default_factory=list)
+    has_next: bool = False
+    has_previous: bool = False
+
+    @property
+    def next_cursor(self):
+        return encode_cursor(self.items[-1]) if self.items else ""
+
+    @property
+    def previous_cursor(self):
+        return encode_cursor(self.items[0]) if self.items else ""
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def paginate_keyset(queryset, after=None, before=None, last=False, per_page=5):
+    """
+    Newest-first page of `queryset` following cursor `after`, preceding cursor
+    `before`, or the oldest page when `last` is set.
+    """
+    after = decode_cursor(after)
+    before = decode_cursor(before)
+
+    if before or last:
+        # Walk backwards (oldest first) and flip the rows afterwards
+        if before:
+            created_at, pk = before
+            queryset = queryset.filter(
+                Q(created_at__gt=created_at) | Q(created_at=created_at, pk__gt=pk)
+            )
+        rows = list(queryset.order_by("created_at", "id")[:per_page + 1])
+        has_more = len(rows) > per_page
+        rows = rows[:per_page][::-1]
+        return KeysetPage(rows, has_next=bool(before), has_previous=has_more)
+
+    if after:
+        created_at, pk = after
+        queryset = queryset.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk)
+        )
+    rows = list(queryset.order_by("-created_at", "-id")[:per_page + 1])
+    return KeysetPage(rows[:per_page], has_next=len(rows) > per_page, has_previous=bool(after))
@@ -0,0 +1,182 @@
+"""
+Per-user request rate limiting and daily OpenAI token budgets.
+
+Requests per minute use a token bucket stored in the RateLimitBucket table and
+updated under a row lock, so every worker process takes from the same bucket.
+Tokens per day are charged from response.usage into DailyTokenUsage and read
+back from it before each generation. Both live in the database rather than
+the Django cache, which is per process unless a shared backend is configured.
+
+Limits come from settings.JD_RATE_LIMITS ("default", then "groups" and
+"users" overrides) and from UsageLimit rows edited in the admin, which win.
+"""
+import math
+import time
+from dataclasses import dataclass
+from datetime import datetime, time as dt_time, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import DailyTokenUsage, RateLimitBucket, UsageLimit
+
+LIMITS_CACHE_SECONDS = 60
+
+
+class RateLimitExceeded(Exception):
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.message = message
+        self.retry_after = retry_after
+
+
+@dataclass
+class Limits:
+    # None means unlimited
+    requests_per_minute: int = None
+    tokens_per_day: int = None
+
+    def merge(self, overrides):
+        for name in ("requests_per_minute", "tokens_per_day"):
+            value = overrides.get(name) if isinstance(overrides, dict) else getattr(overrides, name)
+            if value is not None:
+                setattr(self, name, value)
+
+
+def limits_for(user):
+    """
+    Resolve the effective limits for a user; cached briefly to keep checks cheap.
+    """
+    cache_key = f"jd_rl:limits:{user.pk}"
+    cached = cache.get(cache_key)
+    if cached is not None:
+        return Limits(**cached)
+
+    config = getattr(settings, "JD_RATE_LIMITS", {})
+    limits = Limits()
+    limits.merge(config.get("default", {}))
+
+    group_names = list(user.groups.values_list("name", flat=True))
+    for name in group_names:
+        if name in config.get("groups", {}):
+            limits.merge(config["groups"][name])
+    for override in UsageLimit.objects.filter(group__name__in=group_names, user__isnull=True):
+        limits.merge(override)
+
+    if user.get_username() in config.get("users", {}):
+        limits.merge(config["users"][user.get_username()])
+    for override in UsageLimit.objects.filter(user=user):
+        limits.merge(override)
+
+    cache.set(cache_key, limits.__dict__, LIMITS_CACHE_SECONDS)
+    return limits
+
+
+def _today():
+    return timezone.localdate()
+
+
+def _seconds_until_tomorrow():
+    tomorrow = datetime.combine(_today() + timedelta(days=1), dt_time.min)
+    tomorrow = timezone.make_aware(tomorrow)
+    return max(1, math.ceil((tomorrow - timezone.now()).total_seconds()))
+
+
+def tokens_used_today(user):
+    return (
+        DailyTokenUsage.objects.filter(user=user, day=_today())
+        .values_list("tokens", flat=True)
+        .first()
+    ) or 0
+
+
+def charge_tokens(user_id, tokens):
+    """
+    Add OpenAI token usage to the user's daily total.
+    """
+    tokens = int(tokens or 0)
+    if not tokens or user_id is None:
+        return
+
+    day = _today()
+    updated = DailyTokenUsage.objects.filter(user_id=user_id, day=day).update(
+        tokens=F("tokens") + tokens
+    )
+    if not updated:
+        try:
+            with transaction.atomic():
+                DailyTokenUsage.objects.create(user_id=user_id, day=day, tokens=tokens)
+        except IntegrityError:
+            # Another process created today's row first
+            DailyTokenUsage.objects.filter(user_id=user_id, day=day).update(
+                tokens=F("tokens") + tokens
+            )
+
+
+def _take_from_bucket(state, capacity, now):
+    """
+    Refill the bucket for the elapsed time and take one request from it.
+    Returns (new_state, retry_after) where retry_after is 0 when allowed.
+    """
+    rate = capacity / 60.0
+    tokens, updated_at = state if state else (capacity, now)
+    tokens = min(capacity, tokens + (now - updated_at) * rate)
+
+    if tokens >= 1:
+        return (tokens - 1, now), 0
+    return (tokens, now), max(1, math.ceil((1 - tokens) / rate))
+
+
+def _take_request(user, capacity):
+    """
+    Take one request from the user's bucket; returns retry_after (0 when allowed).
+    """
+    now = time.time()
+    with transaction.atomic():
+        # Writing first takes the row lock (on SQLite, the database write lock)
+        # before the read, so concurrent requests wait instead of overwriting
+        # each other's state
+        if not RateLimitBucket.objects.filter(user=user).update(updated_at=F("updated_at")):
+            try:
+                with transaction.atomic():
+                    RateLimitBucket.objects.create(user=user, tokens=capacity, updated_at=now)
+            except IntegrityError:
+                # Another process created the row first
+                pass
+        row = RateLimitBucket.objects.select_for_update().get(user=user)
+        (row.tokens, row.updated_at), retry_after = _take_from_bucket(
+            (row.tokens, row.updated_at), capacity, now
+        )
+        row.save(update_fields=["tokens", "updated_at"])
+    return retry_after
+
+
+def check_token_budget(user, limits=None):
+    """
+    Raise RateLimitExceeded if the user has used today's token budget.
+    """
+    limits = limits or limits_for(user)
+    if limits.tokens_per_day is not None and tokens_used_today(user) >= limits.tokens_per_day:
+        raise RateLimitExceeded(
+            "You have used today's token budget. Please try again tomorrow.",
+            _seconds_until_tomorrow(),
+        )
+
+
+def enforce(user):
+    """
+    Raise RateLimitExceeded if the user may not start another generation now.
+    """
+    limits = limits_for(user)
+    check_token_budget(user, limits)
+
+    if limits.requests_per_minute is not None:
+        retry_after = _take_request(user, limits.requests_per_minute)
+        if retry_after:
+            raise RateLimitExceeded(
+                f"Too many requests. Please wait {retry_after} seconds and try again.",
+                retry_after,
+            )
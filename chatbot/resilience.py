@@ -0,0 +1,304 @@
+"""
+Deadlines, retries, hedging and a circuit breaker around OpenAI calls.
+
+Every call gets a per-attempt timeout and an overall deadline, so a hung
+upstream cannot hold a worker for longer than JD_OPENAI_DEADLINE. Transient
+failures (timeouts, connection errors, 429 and 5xx) are retried with
+exponential backoff and full jitter. With JD_OPENAI_HEDGE enabled, an attempt
+that is still running after the observed p95 latency gets a second, parallel
+attempt and whichever answers first wins.
+
+The breaker is per process: once at least BREAKER_MIN_CALLS of the last
+BREAKER_WINDOW calls were made and the share of transient failures reaches
+JD_BREAKER_FAILURE_RATIO, calls fail immediately with CircuitOpenError for
+JD_BREAKER_COOLDOWN seconds; then a single trial call decides whether to close
+it again.
+"""
+import asyncio
+import logging
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import openai
+from django.conf import settings
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_ERRORS = (
+    openai.APIConnectionError,  # includes APITimeoutError
+    openai.RateLimitError,
+    openai.InternalServerError,
+)
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 8.0
+BREAKER_WINDOW = 20
+BREAKER_MIN_CALLS = 10
+HEDGE_MIN_SAMPLES = 20
+HEDGE_THREADS = 8
+
+
+class GenerationUnavailable(Exception):
+    """
+    The model could not be reached in time; the message is safe to show users.
+    """
+
+    def __init__(self, message="The job description service is not responding. Please try again shortly.",
+                 retry_after=30):
+        super().__init__(message)
+        self.message = message
+        self.retry_after = retry_after
+
+
+class CircuitOpenError(GenerationUnavailable):
+    pass
+
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._outcomes = deque(maxlen=BREAKER_WINDOW)
+        self.state = self.CLOSED
+        self.opened_at = 0.0
+        self._trial_running = False
+
+    @staticmethod
+    def _cooldown():
+        return getattr(settings, "JD_BREAKER_COOLDOWN", 30)
+
+    def retry_after(self):
+        return max(1, round(self.opened_at + self._cooldown() - time.monotonic()))
+
+    def allow(self):
+        with self._lock:
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < self._cooldown():
+                    return False
+                self.state = self.HALF_OPEN
+                self._trial_running = False
+            if self.state == self.HALF_OPEN:
+                if self._trial_running:
+                    return False
+                self._trial_running = True
+            return True
+
+    def record(self, ok):
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                if ok:
+                    self.state = self.CLOSED
+                    self._outcomes.clear()
+                else:
+                    self._open()
+                return
+
+            self._outcomes.append(ok)
+            failures = self._outcomes.count(False)
+            ratio = getattr(settings, "JD_BREAKER_FAILURE_RATIO", 0.5)
+            if len(self._outcomes) >= BREAKER_MIN_CALLS and failures / len(self._outcomes) >= ratio:
+                self._open()
+
+    def _open(self):
+        logger.warning("OpenAI circuit breaker opened")
+        self.state = self.OPEN
+        self.opened_at = time.monotonic()
+        self._outcomes.clear()
+        self._trial_running = False
+
+    def reset(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self._outcomes.clear()
+            self._trial_running = False
+
+
+class LatencyTracker:
+    """
+    Recent successful attempt latencies, for the hedging threshold.
+    """
+
+    def __init__(self, size=200):
+        self._samples = deque(maxlen=size)
+
+    def add(self, seconds):
+        self._samples.append(seconds)
+
+    def p95(self):
+        if len(self._samples) < HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[int(len(ordered) * 0.95) - 1]
+
+    def clear(self):
+        self._samples.clear()
+
+
+breaker = CircuitBreaker()
+latencies = LatencyTracker()
+_hedge_executor = None
+_hedge_executor_lock = threading.Lock()
+
+
+def _executor():
+    global _hedge_executor
+    with _hedge_executor_lock:
+        if _hedge_executor is None:
+            _hedge_executor = ThreadPoolExecutor(HEDGE_THREADS, thread_name_prefix="jd-hedge")
+        return _hedge_executor
+
+
+def backoff(attempt):
+    """
+    Full jitter: a random wait up to BACKOFF_BASE * 2**attempt, capped.
+    """
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+
+
+def _settings():
+    return (
+        getattr(settings, "JD_OPENAI_TIMEOUT", 30),
+        getattr(settings, "JD_OPENAI_DEADLINE", 60),
+        getattr(settings, "JD_OPENAI_MAX_RETRIES", 2),
+    )
+
+
+def _timed(request, timeout, model, operation):
+    start = time.monotonic()
+    with metrics.track_openai(model, operation):
+        result = request(timeout)
+    latencies.add(time.monotonic() - start)
+    return result
+
+
+def _attempt(request, timeout, model, operation, hedge):
+    threshold = latencies.p95() if hedge and getattr(settings, "JD_OPENAI_HEDGE", False) else None
+    if threshold is None or threshold >= timeout:
+        return _timed(request, timeout, model, operation)
+
+    started = time.monotonic()
+    pending = {_executor().submit(_timed, request, timeout, model, operation)}
+    done, pending = wait(pending, timeout=threshold)
+    if not done:
+        metrics.OPENAI_HEDGES.labels(model).inc()
+        remaining = max(0.1, timeout - (time.monotonic() - started))
+        pending.add(_executor().submit(_timed, request, remaining, model, operation))
+
+    first_error = None
+    while True:
+        for future in done:
+            if future.exception() is None:
+                # The slower attempt keeps running in its thread; its result is dropped
+                return future.result()
+            first_error = first_error or future.exception()
+        if not pending:
+            raise first_error
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+
+
+def call(request, model, operation="chat", hedge=True):
+    """
+    Run request(timeout) with deadlines, retries, hedging and the breaker.
+
+    request performs one upstream attempt and must honour the timeout it is
+    given (the OpenAI SDK takes it as the `timeout` keyword).
+    """
+    if not breaker.allow():
+        metrics.OPENAI_BREAKER_REJECTIONS.labels(model).inc()
+        raise CircuitOpenError(retry_after=breaker.retry_after())
+
+    timeout, deadline, max_retries = _settings()
+    deadline = time.monotonic() + deadline
+    last_error = None
+    for attempt in range(max_retries + 1):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        try:
+            result = _attempt(request, min(timeout, remaining), model, operation, hedge)
+        except RETRYABLE_ERRORS as e:
+            breaker.record(False)
+            last_error = e
+            if attempt < max_retries:
+                metrics.OPENAI_RETRIES.labels(model).inc()
+                time.sleep(min(backoff(attempt), max(0, deadline - time.monotonic())))
+            continue
+        except Exception:
+            # The upstream answered (e.g. 400/401); not a brownout signal
+            breaker.record(True)
+            raise
+        breaker.record(True)
+        return result
+
+    raise GenerationUnavailable() from last_error
+
+
+async def acall(request, model, operation="chat", hedge=True):
+    """
+    Async counterpart of call(); request(timeout) returns an awaitable.
+    """
+    if not breaker.allow():
+        metrics.OPENAI_BREAKER_REJECTIONS.labels(model).inc()
+        raise CircuitOpenError(retry_after=breaker.retry_after())
+
+    async def timed(timeout):
+        start = time.monotonic()
+        with metrics.track_openai(model, operation):
+            result = await request(timeout)
+        latencies.add(time.monotonic() - start)
+        return result
+
+    async def attempt_once(timeout):
+        threshold = latencies.p95() if hedge and getattr(settings, "JD_OPENAI_HEDGE", False) else None
+        if threshold is None or threshold >= timeout:
+            return await timed(timeout)
+
+        first = asyncio.ensure_future(timed(timeout))
+        done, pending = await asyncio.wait({first}, timeout=threshold)
+        if not done:
+            metrics.OPENAI_HEDGES.labels(model).inc()
+            pending.add(asyncio.ensure_future(timed(max(0.1, timeout - threshold))))
+        first_error = None
+        try:
+            while True:
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    first_error = first_error or task.exception()
+                if not pending:
+                    raise first_error
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in pending:
+                task.cancel()
+
+    timeout, deadline, max_retries = _settings()
+    deadline = time.monotonic() + deadline
+    last_error = None
+    for attempt in range(max_retries + 1):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        try:
+            result = await attempt_once(min(timeout, remaining))
+        except RETRYABLE_ERRORS as e:
+            breaker.record(False)
+            last_error = e
+            if attempt < max_retries:
+                metrics.OPENAI_RETRIES.labels(model).inc()
+                await asyncio.sleep(min(backoff(attempt), max(0, deadline - time.monotonic())))
+            continue
+        except Exception:
+            breaker.record(True)
+            raise
+        breaker.record(True)
+        return result
+
+    raise GenerationUnavailable() from last_error
@@ -0,0 +1,112 @@
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+
+from . import metrics
+from .models import CachedResponse
+
+
+def _normalize(value) -> str:
+    """
+    Collapse runs of whitespace so trivially different submissions share a key.
+    """
+    return " ".join(str(value or "").split())
+
+
+def make_fingerprint(prompt_fields: dict, model_params: dict) -> str:
+    """
+    Hash the build_jd_prompt inputs together with the model parameters.
+    """
+    payload = {
+        "fields": {name: _normalize(value) for name, value in prompt_fields.items()},
+        "params": model_params,
+    }
+    encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def _ttl() -> timedelta:
+    return timedelta(seconds=getattr(settings, "JD_CACHE_TTL", 7 * 24 * 60 * 60))
+
+
+def _max_entries() -> int:
+    return getattr(settings, "JD_CACHE_MAX_ENTRIES", 1000)
+
+
+def _count(result: str) -> None:
+    # A Prometheus counter, so the totals cover every worker process
+    metrics.RESPONSE_CACHE_LOOKUPS.labels(result).inc()
+
+
+def lookup(fingerprint: str):
+    """
+    Return the cached job description for a fingerprint, or None on a miss.
+    Expired entries are dropped on the way.
+    """
+    entry = CachedResponse.objects.filter(fingerprint=fingerprint).first()
+    if entry is None:
+        _count("miss")
+        return None
+
+    if entry.created_at < timezone.now() - _ttl():
+        entry.delete()
+        _count("miss")
+        return None
+
+    CachedResponse.objects.filter(pk=entry.pk).update(
+        hit_count=F("hit_count") + 1,
+        last_used_at=timezone.now(),
+    )
+    _count("hit")
+    return entry.answer
+
+
+def peek(fingerprint: str):
+    """
+    Return the stored answer regardless of its age, without touching counters.
+    Used as a degraded result while OpenAI is unavailable.
+    """
+    return (
+        CachedResponse.objects.filter(fingerprint=fingerprint)
+        .values_list("answer", flat=True)
+        .first()
+    )
+
+
+def store(fingerprint: str, answer: str) -> None:
+    """
+    Save a fresh answer and evict the least recently used entries over the limit.
+    """
+    now = timezone.now()
+    CachedResponse.objects.update_or_create(
+        fingerprint=fingerprint,
+        defaults={"answer": answer, "created_at": now, "last_used_at": now, "hit_count": 0},
+    )
+
+    stale_ids = CachedResponse.objects.order_by("-last_used_at").values_list(
+        "pk", flat=True
+    )[_max_entries():]
+    stale_ids = list(stale_ids)
+    if stale_ids:
+        CachedResponse.objects.filter(pk__in=stale_ids).delete()
+
+
+def stats() -> dict:
+    """
+    Hit/miss counters since the server started, summed over its worker
+    processes, plus the current number of stored entries.
+    """
+    lookups = metrics.counter_totals(metrics.RESPONSE_CACHE_LOOKUPS, "result")
+    hits = int(lookups.get("hit", 0))
+    misses = int(lookups.get("miss", 0))
+    total = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_ratio": round(hits / total, 4) if total else 0.0,
+        "entries": CachedResponse.objects.count(),
+    }
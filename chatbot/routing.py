@@ -0,0 +1,189 @@
+"""
+Per-request model and max_tokens selection.
+
+settings.JD_ROUTING_RULES is an ordered list of rules; the first one whose
+conditions all hold picks the model (and optionally max_tokens or
+temperature) for the request, otherwise the "default" route keeps the base
+parameters (GENERATION_PARAMS). Conditions:
+
+    max_input_chars / min_input_chars   total length of the form inputs
+    experience                          list of seniority bands, see seniority()
+    has_notes                           whether the optional notes are filled in
+
+On top of that, max_tokens is calibrated from the completions recorded on
+Past: when enough earlier answers from the same route, model and input bucket
+fit well under the ceiling, it is lowered to their p95 plus headroom. Buckets
+whose answers were cut off by the ceiling are never tightened.
+"""
+import math
+import re
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Past
+from .similarity import parse_question
+
+CALIBRATION_CACHE_KEY = "jd_routing:calibration"
+CALIBRATION_CACHE_SECONDS = 600
+# Ceilings are rounded up to a multiple of this and never go below MIN_MAX_TOKENS
+CEILING_STEP = 50
+MIN_MAX_TOKENS = 256
+# Buckets where more than this share of answers hit the ceiling keep the full one
+MAX_TRUNCATED_SHARE = 0.02
+
+_YEARS = re.compile(r"(\d+)\s*\+?\s*(?:years?|yrs?)")
+# Whole words only, so that "International" is not an intern and "Headquarters" not a head
+_LEAD = re.compile(r"\b(?:lead|principal|staff|head|manager|director)\b")
+_SENIOR = re.compile(r"\b(?:senior|sr)\b")
+_JUNIOR = re.compile(r"\b(?:junior|jr|entry|intern|graduate)\b")
+# "mid" may run on, as in "midlevel"
+_MID = re.compile(r"\bmid")
+
+
+@dataclass(frozen=True)
+class Route:
+    name: str
+    bucket: str
+    params: dict = field(default_factory=dict)
+    calibrated: bool = False
+
+    @property
+    def model(self):
+        return self.params["model"]
+
+    @property
+    def label(self):
+        """
+        What is stored on Past.route, e.g. "short-role+calibrated".
+        """
+        return f"{self.name}+calibrated" if self.calibrated else self.name
+
+
+def seniority(experience_level):
+    """
+    Coarse band for an experience level: junior, mid, senior, lead or other.
+    """
+    text = (experience_level or "").lower()
+    if _LEAD.search(text):
+        return "lead"
+    if _SENIOR.search(text):
+        return "senior"
+    if _JUNIOR.search(text):
+        return "junior"
+    if _MID.search(text):
+        return "mid"
+    years = _YEARS.search(text)
+    if years:
+        years = int(years.group(1))
+        return "junior" if years < 2 else "mid" if years < 5 else "senior"
+    return "other"
+
+
+def bucket_for(experience_level, notes):
+    """
+    Inputs with the same bucket are expected to produce answers of similar length.
+    """
+    return f"{seniority(experience_level)}:{'notes' if notes else 'plain'}"
+
+
+def input_chars(form):
+    return sum(len(value or "") for value in form.values())
+
+
+def _matches(rule, form):
+    size = input_chars(form)
+    if "max_input_chars" in rule and size > rule["max_input_chars"]:
+        return False
+    if "min_input_chars" in rule and size < rule["min_input_chars"]:
+        return False
+    if "experience" in rule and seniority(form.get("experience_level")) not in rule["experience"]:
+        return False
+    if "has_notes" in rule and bool(form.get("company_tone")) != rule["has_notes"]:
+        return False
+    return True
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def calibration_table():
+    """
+    {(route, model, bucket): (samples, p95 completion tokens, truncated share)}
+    over the most recent recorded completions, cached for a few minutes.
+    """
+    table = cache.get(CALIBRATION_CACHE_KEY)
+    if table is not None:
+        return table
+
+    window = getattr(settings, "JD_CALIBRATION_WINDOW", 2000)
+    rows = (
+        Past.objects.filter(completion_tokens__gt=0)
+        .exclude(model="")
+        .order_by("-created_at")
+        .values_list("route", "model", "question", "completion_tokens", "truncated")[:window]
+    )
+    groups = {}
+    for route, model, question, completion_tokens, truncated in rows:
+        inputs = parse_question(question)
+        key = (
+            route.split("+", 1)[0],
+            model,
+            bucket_for(inputs.get("experience level"), inputs.get("optional")),
+        )
+        groups.setdefault(key, []).append((completion_tokens, truncated))
+
+    table = {
+        key: (
+            len(samples),
+            percentile([tokens for tokens, _ in samples], 0.95),
+            sum(1 for _, truncated in samples if truncated) / len(samples),
+        )
+        for key, samples in groups.items()
+    }
+    cache.set(CALIBRATION_CACHE_KEY, table, CALIBRATION_CACHE_SECONDS)
+    return table
+
+
+def calibrated_max_tokens(route_name, model, bucket, ceiling):
+    """
+    A tighter max_tokens for this bucket, or None to keep `ceiling`.
+    """
+    stats = calibration_table().get((route_name, model, bucket))
+    if stats is None:
+        return None
+    samples, p95, truncated_share = stats
+    if samples < getattr(settings, "JD_CALIBRATION_MIN_SAMPLES", 30):
+        return None
+    if truncated_share > MAX_TRUNCATED_SHARE:
+        return None
+
+    headroom = getattr(settings, "JD_CALIBRATION_HEADROOM", 1.25)
+    tightened = max(MIN_MAX_TOKENS, math.ceil(p95 * headroom / CEILING_STEP) * CEILING_STEP)
+    return tightened if tightened < ceiling else None
+
+
+def choose(form, base_params):
+    """
+    The Route for one form: the first matching rule applied to base_params,
+    then max_tokens calibration.
+    """
+    name, params = "default", dict(base_params)
+    for rule in getattr(settings, "JD_ROUTING_RULES", []):
+        if _matches(rule, form):
+            name = rule["name"]
+            params.update({key: rule[key] for key in ("model", "max_tokens", "temperature") if key in rule})
+            break
+
+    bucket = bucket_for(form.get("experience_level"), form.get("company_tone"))
+    calibrated = False
+    if getattr(settings, "JD_CALIBRATE_MAX_TOKENS", True):
+        ceiling = calibrated_max_tokens(name, params["model"], bucket, params["max_tokens"])
+        if ceiling is not None:
+            params["max_tokens"] = ceiling
+            calibrated = True
+
+    return Route(name=name, bucket=bucket, params=params, calibrated=calibrated)
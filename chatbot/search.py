@@ -0,0 +1,154 @@
+"""
+Full-text search over a user's generation history.
+
+The backend is chosen by settings.JD_SEARCH_BACKEND (a dotted path). On SQLite
+the default is an FTS5 index kept in sync with chatbot_past by triggers (see
+migration 0010); other databases fall back to a plain icontains scan until a
+dedicated backend, e.g. Postgres tsvector, is plugged in.
+"""
+from dataclasses import dataclass
+from datetime import datetime
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.utils.html import escape
+from django.utils.module_loading import import_string
+from django.utils.safestring import mark_safe
+
+from .models import Past
+
+FTS_TABLE = "chatbot_past_fts"
+
+# Private-use characters survive escape(), so they can mark matches safely
+_MARK_START = "\ue000"
+_MARK_END = "\ue001"
+
+
+@dataclass
+class SearchResult:
+    id: int
+    created_at: datetime
+    question: str
+    question_snippet: str
+    answer_snippet: str
+
+
+def highlight(snippet):
+    """
+    Escape a snippet and turn the match markers into <mark> tags.
+    """
+    html = escape(snippet).replace(_MARK_START, "<mark>").replace(_MARK_END, "</mark>")
+    return mark_safe(html)
+
+
+class BaseSearchBackend:
+    def search(self, user, query, limit=20):
+        """
+        Return up to `limit` SearchResults for the user's rows, best match first.
+        """
+        raise NotImplementedError
+
+    def rebuild(self):
+        """
+        Re-index every Past row; returns the number of rows indexed.
+        """
+        raise NotImplementedError
+
+
+class BasicSearchBackend(BaseSearchBackend):
+    """
+    Unranked substring match; works on every database but scans the user's rows.
+    """
+
+    def search(self, user, query, limit=20):
+        terms = query.split()
+        if not terms:
+            return []
+
+        rows = Past.objects.filter(user=user)
+        for term in terms:
+            rows = rows.filter(Q(question__icontains=term) | Q(answer__icontains=term))
+
+        return [
+            SearchResult(
+                id=past.id,
+                created_at=past.created_at,
+                question=past.question,
+                question_snippet=escape(past.question),
+                answer_snippet=escape(past.answer[:200]),
+            )
+            for past in rows.order_by("-created_at")[:limit]
+        ]
+
+    def rebuild(self):
+        return Past.objects.count()
+
+
+class SQLiteFTSBackend(BaseSearchBackend):
+    """
+    BM25-ranked FTS5 search with highlighted snippets.
+    """
+
+    @staticmethod
+    def build_match(query):
+        """
+        Quote every term so user input cannot inject FTS5 syntax; the last term
+        is a prefix match so results show up while typing.
+        """
+        terms = ['"{}"'.format(term.replace('"', '""')) for term in query.split()]
+        if not terms:
+            return ""
+        terms[-1] += "*"
+        return " ".join(terms)
+
+    def search(self, user, query, limit=20):
+        match = self.build_match(query)
+        if not match:
+            return []
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                SELECT p.id,
+                       snippet({FTS_TABLE}, 0, %s, %s, '…', 12),
+                       snippet({FTS_TABLE}, 1, %s, %s, '…', 32)
+                FROM {FTS_TABLE}
+                JOIN chatbot_past p ON p.id = {FTS_TABLE}.rowid
+                WHERE {FTS_TABLE} MATCH %s AND p.user_id = %s
+                ORDER BY bm25({FTS_TABLE}, 2.0, 1.0)
+                LIMIT %s
+                """,
+                [_MARK_START, _MARK_END, _MARK_START, _MARK_END, match, user.pk, limit],
+            )
+            ranked = cursor.fetchall()
+
+        rows = Past.objects.only("id", "created_at", "question").in_bulk(
+            [row[0] for row in ranked]
+        )
+        return [
+            SearchResult(
+                id=past_id,
+                created_at=rows[past_id].created_at,
+                question=rows[past_id].question,
+                question_snippet=highlight(question_snippet),
+                answer_snippet=highlight(answer_snippet),
+            )
+            for past_id, question_snippet, answer_snippet in ranked
+            if past_id in rows
+        ]
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES('rebuild')")
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES('optimize')")
+        return Past.objects.count()
+
+
+def get_search_backend():
+    backend_path = getattr(settings, "JD_SEARCH_BACKEND", None)
+    if backend_path:
+        return import_string(backend_path)()
+    if connection.vendor == "sqlite":
+        return SQLiteFTSBackend()
+    return BasicSearchBackend()
@@ -0,0 +1,266 @@
+"""
+Section-level editing of a stored job description.
+
+build_jd_prompt asks for a title heading, "Responsibilities:", "Requirements:",
+an optional "Nice to Have:" and a closing paragraph. parse() splits an answer
+into those parts, keeping the exact text of each, so that splice() can swap
+one part for a regenerated one and leave every other character untouched.
+regenerate() asks the model for a single part with a short prompt (the form
+inputs, the title and the part itself) and saves the result as a new Past row.
+"""
+import re
+from dataclasses import dataclass, replace
+
+from . import ratelimit, routing
+from .generation import (
+    GENERATION_PARAMS,
+    SYSTEM_PROMPT,
+    form_from_question,
+    request_completion,
+)
+from .models import Past
+
+# Headings the model uses for the parts build_jd_prompt asks for
+HEADING_KEYS = {
+    "responsibilities": "responsibilities",
+    "key responsibilities": "responsibilities",
+    "what you'll do": "responsibilities",
+    "requirements": "requirements",
+    "qualifications": "requirements",
+    "required qualifications": "requirements",
+    "nice to have": "nice_to_have",
+    "nice-to-have": "nice_to_have",
+    "preferred qualifications": "nice_to_have",
+    "bonus points": "nice_to_have",
+}
+LABELS = {
+    "title": "Title",
+    "intro": "Introduction",
+    "responsibilities": "Responsibilities",
+    "requirements": "Requirements",
+    "nice_to_have": "Nice to Have",
+    "closing": "Closing paragraph",
+}
+# What to ask for, per part
+SHAPES = {
+    "title": "Reply with the job title only, on one line.",
+    "intro": "Write one or two sentences introducing the role.",
+    "responsibilities": 'Write 5 to 8 bullet points, each starting with "- ".',
+    "requirements": 'Write 5 to 8 bullet points, each starting with "- ".',
+    "nice_to_have": 'Write 3 to 5 bullet points, each starting with "- ".',
+    "closing": "Write one short paragraph about location / remote policy and company culture.",
+}
+# Ceilings for one part; a whole job description gets GENERATION_PARAMS["max_tokens"]
+MAX_TOKENS = {
+    "title": 30,
+    "intro": 120,
+    "responsibilities": 300,
+    "requirements": 300,
+    "nice_to_have": 200,
+    "closing": 160,
+}
+
+# "Requirements:", "## Requirements", "**Requirements:**" and similar, alone on a line
+_HEADING = re.compile(
+    r"^\s*(?:#{1,6}\s*)?(?P<bold>\*\*)?\s*(?P<name>[A-Za-z][A-Za-z '’\-/&]{0,40}?)\s*:?\s*(?(bold)\*\*)\s*:?\s*$"
+)
+_BULLET = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s+")
+# Markup around a title line, kept when the title is replaced
+_TITLE = re.compile(r"^(?P<prefix>\s*(?:#{1,6}\s*)?(?:\*\*)?)(?P<text>.*?)(?P<suffix>(?:\*\*)?\s*)$", re.S)
+
+
+class SectionError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class Section:
+    key: str
+    heading: str
+    body: str
+
+    @property
+    def label(self):
+        return LABELS.get(self.key) or self.heading.strip(" \n#*:") or "Text"
+
+    @property
+    def editable(self):
+        return self.key in LABELS
+
+    @property
+    def text(self):
+        return self.heading + self.body
+
+
+def _heading_key(line, seen):
+    """
+    The section key of a heading line, "other" for an unknown heading, None
+    for a line that is not a heading.
+    """
+    match = _HEADING.match(line)
+    if not match or not (line.rstrip().endswith(":") or line.lstrip().startswith(("#", "**"))):
+        return None
+    key = HEADING_KEYS.get(match.group("name").lower().replace("’", "'"))
+    return key if key and key not in seen else "other"
+
+
+def parse(text):
+    """
+    Split a job description into Sections whose texts add up to `text` exactly.
+    """
+    lines = text.splitlines(keepends=True)
+    sections = []
+    seen = set()
+    i = 0
+
+    # Blank lines before the title stay with it
+    while i < len(lines) and not lines[i].strip():
+        i += 1
+    # The first line is the title unless it is one of the known headings
+    if i < len(lines) and _heading_key(lines[i], seen) in (None, "other"):
+        i += 1
+        while i < len(lines) and not lines[i].strip():
+            i += 1
+        sections.append(Section("title", "", "".join(lines[:i])))
+    else:
+        i = 0
+
+    key, heading, body = "intro", "", []
+    for line in lines[i:]:
+        found = _heading_key(line, seen)
+        if found is None:
+            body.append(line)
+            continue
+        if heading or "".join(body).strip():
+            sections.append(Section(key, heading, "".join(body)))
+        seen.add(found)
+        key, heading, body = found, line, []
+    if heading or "".join(body).strip():
+        sections.append(Section(key, heading, "".join(body)))
+
+    return _split_closing(sections)
+
+
+def _split_closing(sections):
+    """
+    Move the paragraph after the last bullet of the last section into its own
+    "closing" section.
+    """
+    if not sections or sections[-1].key in ("title", "intro"):
+        return sections
+    last = sections[-1]
+    body = last.body.splitlines(keepends=True)
+    bullets = [n for n, line in enumerate(body) if _BULLET.match(line)]
+    if not bullets:
+        return sections
+    # The paragraph starts at the first non-blank line after the last bullet
+    start = next(
+        (n for n in range(bullets[-1] + 1, len(body)) if body[n].strip() and not body[n].startswith((" ", "\t"))),
+        None,
+    )
+    if start is None:
+        return sections
+    return sections[:-1] + [
+        replace(last, body="".join(body[:start])),
+        Section("closing", "", "".join(body[start:])),
+    ]
+
+
+def editable(text):
+    """
+    (key, label) of the parts of a job description that can be regenerated.
+    """
+    return [(section.key, section.label) for section in parse(text) if section.editable]
+
+
+def _reshape(old, new):
+    """
+    `new` with the surrounding whitespace (and for a title, the markup) of `old`.
+    """
+    leading = old[: len(old) - len(old.lstrip())]
+    trailing = old[len(old.rstrip()):]
+    return leading + new.strip() + trailing
+
+
+def splice(text, key, new):
+    """
+    `text` with the body of section `key` replaced by `new`.
+    """
+    sections = parse(text)
+    if key not in [section.key for section in sections if section.editable]:
+        raise SectionError(f'This job description has no "{LABELS.get(key, key)}" section.')
+
+    result = []
+    for section in sections:
+        if section.key == key:
+            if key == "title":
+                title = _TITLE.match(section.body.strip("\n"))
+                new = title.group("prefix") + new.strip().strip("#* ") + title.group("suffix")
+            section = replace(section, body=_reshape(section.body, new))
+        result.append(section.text)
+    return "".join(result)
+
+
+def build_section_prompt(form, sections, key, instructions=""):
+    """
+    A short prompt for one part: the form inputs, the title, the names of the
+    other parts (so content is not repeated) and the current text of the part.
+    """
+    current = next(section for section in sections if section.key == key)
+    title = next((section.body.strip() for section in sections if section.key == "title"), "")
+    others = [section.label for section in sections if section.key not in (key, "title")]
+
+    lines = [
+        f'Rewrite the "{current.label}" part of a job description. {SHAPES[key]}',
+        "",
+        f"- Company: {form['company_name']}",
+        f"- Job Title: {form['job_title']}",
+        f"- Tech Skills: {form['tech_skills']}",
+        f"- Experience Level: {form['experience_level']}",
+        f"- Location: {form['location']}",
+    ]
+    if form["company_tone"]:
+        lines.append(f"- Extra notes from the user (optional): {form['company_tone']}")
+    if title and key != "title":
+        lines += ["", f"Title of the job description: {title}"]
+    if others:
+        lines += [f"Other parts, do not repeat their content: {', '.join(others)}"]
+    lines += ["", "Current text:", current.body.strip()]
+    if instructions:
+        lines += ["", f"What the user wants changed: {instructions}"]
+    lines += ["", "Reply with the new text only, without a heading."]
+    return "\n".join(lines)
+
+
+def regenerate(past, key, instructions="", user_id=None):
+    """
+    Regenerate one section of a Past row and save the spliced text as a new
+    Past row (a revision of `past`). Raises SectionError for a section the
+    text does not have or an empty answer.
+    """
+    sections = parse(past.answer)
+    if key not in [section.key for section in sections if section.editable]:
+        raise SectionError(f'This job description has no "{LABELS.get(key, key)}" section.')
+
+    form = form_from_question(past.question)
+    route = routing.Route(
+        name=f"section-{key}",
+        bucket=routing.bucket_for(form["experience_level"], form["company_tone"]),
+        params={**GENERATION_PARAMS, "max_tokens": MAX_TOKENS[key]},
+    )
+    messages = [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": build_section_prompt(form, sections, key, instructions.strip())},
+    ]
+    completion = request_completion(form, route, messages=messages)
+    ratelimit.charge_tokens(user_id, completion.total_tokens)
+    if not completion.text:
+        raise SectionError("No response received from the model.")
+
+    return Past.objects.create(
+        user_id=past.user_id,
+        question=past.question,
+        answer=splice(past.answer, key, completion.text),
+        revision_of=past,
+        **completion.past_fields(),
+    )
@@ -0,0 +1,24 @@
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import history, metrics, similarity, sqlite
+from .models import Past
+
+
+@receiver(post_save, sender=Past)
+def index_new_past(sender, instance, created, raw=False, **kwargs):
+    # bulk_create skips this signal; chatbot.batch indexes its rows itself
+    if created and not raw:
+        similarity.index_pasts([instance])
+
+
+@receiver(post_save, sender=Past)
+@receiver(post_delete, sender=Past)
+def touch_history(sender, instance, raw=False, **kwargs):
+    if not raw:
+        history.touch(instance.user_id)
+
+
+connection_created.connect(metrics.install_query_counter)
+connection_created.connect(sqlite.apply_pragmas)
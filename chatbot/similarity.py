@@ -0,0 +1,157 @@
+"""
+Near-duplicate detection over the inputs of past generations (MinHash + LSH).
+
+Every Past row gets a 64-value MinHash signature of its input tokens, split
+into 16 bands of 4 values. Each band is hashed into a bucket stored in an
+indexed table, so finding candidates for a new request is 16 index probes
+(user_id, bucket) no matter how many rows exist; only the few candidates that share a bucket have
+their signatures compared.
+"""
+import hashlib
+import random
+import re
+import struct
+
+from django.conf import settings
+from django.db.models import Count
+
+from .models import PastSignature, SimilarityBucket
+
+NUM_PERM = 64
+BANDS = 16
+ROWS_PER_BAND = NUM_PERM // BANDS
+MAX_CANDIDATES = 50
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_rng = random.Random(20240601)
+_PERMUTATIONS = [
+    (_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME))
+    for _ in range(NUM_PERM)
+]
+_SIGNATURE_FORMAT = f"<{NUM_PERM}I"
+
+
+def _hash64(text):
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def parse_question(question):
+    """
+    Split a Past.question ("Label: value" per line) into {label: value}.
+    """
+    fields = {}
+    for line in question.splitlines():
+        label, sep, value = line.partition(":")
+        if sep:
+            fields[label.strip().lower()] = value.strip()
+    return fields
+
+
+def tokens_for_question(question):
+    """
+    Field-qualified words, so "Remote" as a location differs from "Remote" in notes.
+    """
+    tokens = set()
+    for label, value in parse_question(question).items():
+        for word in re.findall(r"[a-z0-9+#.]+", value.lower()):
+            tokens.add(f"{label}:{word}")
+    return tokens
+
+
+def minhash(tokens):
+    hashes = [_hash64(token) for token in tokens]
+    if not hashes:
+        return [0xFFFFFFFF] * NUM_PERM
+    return [
+        min((a * h + b) % _MERSENNE_PRIME for h in hashes) & 0xFFFFFFFF
+        for a, b in _PERMUTATIONS
+    ]
+
+
+def band_buckets(signature):
+    """
+    One non-negative 63-bit bucket id per band (fits a BigIntegerField everywhere).
+
+    The band number is part of the hash, so a plain `bucket IN (...)` lookup
+    cannot match the same values in a different band.
+    """
+    buckets = []
+    for band in range(BANDS):
+        values = signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]
+        packed = struct.pack(f"<H{ROWS_PER_BAND}I", band, *values)
+        digest = hashlib.blake2b(packed, digest_size=8).digest()
+        buckets.append(int.from_bytes(digest, "little") >> 1)
+    return buckets
+
+
+def pack(signature):
+    return struct.pack(_SIGNATURE_FORMAT, *signature)
+
+
+def unpack(data):
+    return struct.unpack(_SIGNATURE_FORMAT, bytes(data))
+
+
+def estimate_similarity(first, second):
+    return sum(a == b for a, b in zip(first, second)) / NUM_PERM
+
+
+def index_pasts(pasts):
+    """
+    Add signatures and LSH buckets for freshly written Past rows.
+    """
+    signatures = []
+    buckets = []
+    for past in pasts:
+        # Rows without an owner, or without a pk from bulk_create on backends that
+        # cannot return one, are left out of the index
+        if past.user_id is None or past.pk is None:
+            continue
+        signature = minhash(tokens_for_question(past.question))
+        signatures.append(
+            PastSignature(past_id=past.pk, user_id=past.user_id, minhash=pack(signature))
+        )
+        buckets.extend(
+            SimilarityBucket(signature_id=past.pk, user_id=past.user_id, bucket=bucket)
+            for bucket in band_buckets(signature)
+        )
+
+    PastSignature.objects.bulk_create(signatures, ignore_conflicts=True)
+    SimilarityBucket.objects.bulk_create(buckets)
+
+
+def find_similar(user, question, threshold=None):
+    """
+    Return (past, score) for the user's most similar earlier request at or above
+    the threshold, or None. Identical inputs are left to the response cache.
+    """
+    if threshold is None:
+        threshold = getattr(settings, "JD_SIMILARITY_THRESHOLD", 0.8)
+    signature = minhash(tokens_for_question(question))
+
+    candidate_ids = list(
+        SimilarityBucket.objects.filter(user=user, bucket__in=band_buckets(signature))
+        .values("signature_id")
+        .annotate(shared=Count("id"))
+        .order_by("-shared")
+        .values_list("signature_id", flat=True)[:MAX_CANDIDATES]
+    )
+    if not candidate_ids:
+        return None
+
+    best = None
+    candidates = (
+        PastSignature.objects.filter(pk__in=candidate_ids)
+        .select_related("past")
+        .defer("past__answer", "past__answer_html")
+    )
+    for candidate in candidates:
+        score = estimate_similarity(signature, unpack(candidate.minhash))
+        if score >= 1.0 or score < threshold:
+            continue
+        if best is None or score > best[1] or (
+            score == best[1] and candidate.past.created_at > best[0].created_at
+        ):
+            best = (candidate.past, score)
+
+    return best
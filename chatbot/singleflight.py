@@ -0,0 +1,186 @@
+"""
+Single-flight coalescing of identical generations across processes.
+
+The first request for a response-cache fingerprint takes a GenerationLease and
+calls OpenAI. Identical requests that arrive while it is in flight, in any
+worker process, wait for the answer the leader stores in the response cache
+instead of calling OpenAI themselves. A follower takes over the lease when the
+leader released it without an answer or its lease ran out because the process
+died; a follower that waited JD_SINGLEFLIGHT_WAIT seconds generates on its own.
+"""
+import asyncio
+import time
+import uuid
+from contextlib import asynccontextmanager, contextmanager
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from . import metrics
+from .models import CachedResponse, GenerationLease
+
+# Followers poll every POLL_MIN seconds at first, backing off to POLL_MAX
+POLL_MIN = 0.05
+POLL_MAX = 0.5
+
+
+def _enabled():
+    return getattr(settings, "JD_SINGLEFLIGHT", True)
+
+
+def acquire(fingerprint):
+    """
+    Take the lease for a fingerprint. Returns the owner token, or None while
+    another process holds a lease that has not expired.
+    """
+    now = timezone.now()
+    token = uuid.uuid4().hex
+    lease = {
+        "owner": token,
+        "started_at": now,
+        "expires_at": now + timedelta(seconds=getattr(settings, "JD_SINGLEFLIGHT_LEASE_SECONDS", 90)),
+    }
+    try:
+        with transaction.atomic():
+            GenerationLease.objects.create(fingerprint=fingerprint, **lease)
+        return token
+    except IntegrityError:
+        # Conditional, so only one follower takes over an expired lease
+        taken = GenerationLease.objects.filter(
+            fingerprint=fingerprint, expires_at__lt=now
+        ).update(**lease)
+        return token if taken else None
+
+
+def release(fingerprint, token):
+    GenerationLease.objects.filter(fingerprint=fingerprint, owner=token).delete()
+
+
+def _leader_started(fingerprint):
+    started = (
+        GenerationLease.objects.filter(fingerprint=fingerprint)
+        .values_list("started_at", flat=True)
+        .first()
+    )
+    return started or timezone.now()
+
+
+def _answer_since(fingerprint, since):
+    return (
+        CachedResponse.objects.filter(fingerprint=fingerprint, created_at__gte=since)
+        .values_list("answer", flat=True)
+        .first()
+    )
+
+
+def _check(fingerprint, since):
+    """
+    One follower poll: (answer, None) once the leader stored an answer,
+    (None, token) when this caller took over the lease, otherwise None.
+    """
+    answer = _answer_since(fingerprint, since)
+    if answer is not None:
+        return answer, None
+    if GenerationLease.objects.filter(fingerprint=fingerprint, expires_at__gte=timezone.now()).exists():
+        return None
+
+    token = acquire(fingerprint)
+    if token is None:
+        return None
+    # The leader may have stored its answer and released just before we looked
+    answer = _answer_since(fingerprint, since)
+    if answer is not None:
+        release(fingerprint, token)
+        return answer, None
+    return None, token
+
+
+def _record(answer, token):
+    if answer is not None:
+        metrics.SINGLEFLIGHT.labels("shared").inc()
+    else:
+        metrics.SINGLEFLIGHT.labels("takeover" if token else "timeout").inc()
+    return answer, token
+
+
+def follow(fingerprint):
+    """
+    Wait for the in-flight generation of a fingerprint. Returns (answer, None)
+    with the leader's answer, (None, token) after taking over the lease, or
+    (None, None) when JD_SINGLEFLIGHT_WAIT ran out.
+    """
+    since = _leader_started(fingerprint)
+    deadline = time.monotonic() + getattr(settings, "JD_SINGLEFLIGHT_WAIT", 60)
+    interval = POLL_MIN
+    while time.monotonic() < deadline:
+        time.sleep(interval)
+        interval = min(interval * 2, POLL_MAX)
+        result = _check(fingerprint, since)
+        if result is not None:
+            return _record(*result)
+    return _record(None, None)
+
+
+async def afollow(fingerprint):
+    """
+    follow() for async views; waits with asyncio.sleep between the polls.
+    """
+    since = await sync_to_async(_leader_started)(fingerprint)
+    deadline = time.monotonic() + getattr(settings, "JD_SINGLEFLIGHT_WAIT", 60)
+    interval = POLL_MIN
+    while time.monotonic() < deadline:
+        await asyncio.sleep(interval)
+        interval = min(interval * 2, POLL_MAX)
+        result = await sync_to_async(_check)(fingerprint, since)
+        if result is not None:
+            return _record(*result)
+    return _record(None, None)
+
+
+@contextmanager
+def flight(fingerprint):
+    """
+    Yields the answer of an identical generation that was already in flight,
+    or None when the caller should generate (and store the answer in the
+    response cache) itself. The lease is released on exit.
+    """
+    if not _enabled():
+        yield None
+        return
+
+    token = acquire(fingerprint)
+    answer = None
+    if token is None:
+        answer, token = follow(fingerprint)
+    else:
+        metrics.SINGLEFLIGHT.labels("leader").inc()
+    try:
+        yield answer
+    finally:
+        if token:
+            release(fingerprint, token)
+
+
+@asynccontextmanager
+async def aflight(fingerprint):
+    """
+    Async version of flight().
+    """
+    if not _enabled():
+        yield None
+        return
+
+    token = await sync_to_async(acquire)(fingerprint)
+    answer = None
+    if token is None:
+        answer, token = await afollow(fingerprint)
+    else:
+        metrics.SINGLEFLIGHT.labels("leader").inc()
+    try:
+        yield answer
+    finally:
+        if token:
+            await sync_to_async(release)(fingerprint, token)
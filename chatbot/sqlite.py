@@ -0,0 +1,24 @@
+"""
+Per-connection SQLite tuning.
+
+Django opens SQLite in rollback-journal mode, where a writer locks readers out
+and concurrent gunicorn workers quickly run into "database is locked". The
+pragmas in settings.JD_SQLITE_PRAGMAS are applied to every new connection;
+journal_mode=WAL is stored in the database file, the others last for the
+connection.
+"""
+from django.conf import settings
+
+
+def apply_pragmas(sender, connection, **kwargs):
+    """
+    connection_created receiver: run the configured PRAGMAs on SQLite connections.
+    """
+    if connection.vendor != "sqlite":
+        return
+    pragmas = getattr(settings, "JD_SQLITE_PRAGMAS", {})
+    if not pragmas:
+        return
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
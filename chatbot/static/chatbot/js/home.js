@@ -0,0 +1,137 @@
+// Generator page: copy button, streamed generation (SSE) and queue-mode polling.
+
+function copyJD() {
+  const text = document.getElementById("jd-content").innerText;
+  navigator.clipboard.writeText(text).then(function () {
+    alert("Job description copied to clipboard!");
+  });
+}
+
+// Stream the generation over SSE; fall back to a normal POST if unsupported.
+(function () {
+  const form = document.getElementById("jd-form");
+  if (
+    !form.dataset.streamUrl ||
+    !window.fetch ||
+    !window.ReadableStream ||
+    !window.TextDecoder
+  ) {
+    return;
+  }
+
+  form.addEventListener("submit", async function (event) {
+    // Several versions come back together, so they use a normal POST
+    if (form.elements.variants && Number(form.elements.variants.value) > 1) {
+      return;
+    }
+    event.preventDefault();
+    const content = document.getElementById("jd-content");
+    const submit = document.getElementById("jd-submit");
+    const badge = document.getElementById("jd-cache-badge");
+    let committed = "";
+
+    const body = new FormData(form);
+    if (event.submitter && event.submitter.name) {
+      body.append(event.submitter.name, event.submitter.value);
+    }
+
+    submit.disabled = true;
+    badge.classList.add("d-none");
+    document.getElementById("jd-similar").innerHTML = "";
+    document.getElementById("jd-sections").innerHTML = "";
+    content.innerHTML = '<span class="text-muted">Generating...</span>';
+
+    function handle(eventName, data) {
+      if (eventName === "delta") {
+        committed += data.append;
+        content.innerHTML = committed + data.tail;
+      } else if (eventName === "done") {
+        content.innerHTML = data.html;
+        badge.classList.toggle("d-none", !data.cache_hit);
+        document.getElementById("jd-actions").classList.remove("d-none");
+        document.getElementById("jd-sections").innerHTML = data.sections_html;
+      } else if (eventName === "similar") {
+        document.getElementById("jd-similar").innerHTML = data.html;
+        content.innerHTML =
+          '<span class="text-muted">Reuse the earlier job description or generate a new one.</span>';
+      } else if (eventName === "error") {
+        content.textContent = data.message;
+      }
+    }
+
+    try {
+      const response = await fetch(form.dataset.streamUrl, {
+        method: "POST",
+        body: body,
+        credentials: "same-origin",
+      });
+      if (response.status === 429) {
+        // Rate limited: a plain POST would be refused too
+        handle("error", await response.json());
+        return;
+      }
+      if (!response.ok) {
+        throw new Error("HTTP " + response.status);
+      }
+
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = "";
+
+      while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        let boundary;
+        while ((boundary = buffer.indexOf("\n\n")) !== -1) {
+          const raw = buffer.slice(0, boundary);
+          buffer = buffer.slice(boundary + 2);
+          let eventName = "message";
+          let payload = "";
+          raw.split("\n").forEach(function (line) {
+            if (line.startsWith("event: ")) eventName = line.slice(7);
+            if (line.startsWith("data: ")) payload += line.slice(6);
+          });
+          if (payload) handle(eventName, JSON.parse(payload));
+        }
+      }
+    } catch (error) {
+      form.submit();
+      return;
+    } finally {
+      submit.disabled = false;
+    }
+  });
+})();
+
+// Queue mode: poll the job until a worker has finished it.
+(function () {
+  const content = document.getElementById("jd-content");
+  const jobUrl = content.dataset.jobUrl;
+  if (!jobUrl) {
+    return;
+  }
+
+  function poll() {
+    fetch(jobUrl, { credentials: "same-origin" })
+      .then(function (response) {
+        return response.json();
+      })
+      .then(function (data) {
+        if (data.status === "done") {
+          content.innerHTML = data.html;
+          document.getElementById("jd-actions").classList.remove("d-none");
+        } else if (data.status === "failed") {
+          content.textContent = data.error;
+        } else {
+          setTimeout(poll, 1000);
+        }
+      })
+      .catch(function () {
+        setTimeout(poll, 3000);
+      });
+  }
+
+  poll();
+})();
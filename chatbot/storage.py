@@ -0,0 +1,18 @@
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+
+class StaticStorage(CompressedManifestStaticFilesStorage):
+    """
+    Content-hashed static files with .gz and .br copies written by collectstatic.
+
+    Until collectstatic has run (tests, a fresh checkout) there is no manifest,
+    so {% static %} falls back to the plain file name instead of raising.
+    """
+
+    manifest_strict = False
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            return name
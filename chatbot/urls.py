@@ -1,12 +1,25 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
 urlpatterns = [
-    path('', views.home, name="home"),
+    path('', views.home_async if settings.JD_ASYNC_VIEWS else views.home, name="home"),
+    path('generate/stream', views.generate_stream, name="generate_stream"),
+    path('drafts/<int:draft_id>/promote', views.promote_draft, name="promote_draft"),
+    path('jobs/<int:job_id>', views.job_status, name="job_status"),
+    path('batch/', views.batch_list, name="batch_list"),
+    path('batch/<int:batch_id>', views.batch_detail, name="batch_detail"),
+    path('batch/<int:batch_id>/download', views.batch_download, name="batch_download"),
     path('past', views.past, name="past"),
+    path('past/search', views.search_past, name="search_past"),
+    path('past/export', views.export_past, name="export_past"),
+    path('past/delete', views.bulk_delete_past, name="bulk_delete_past"),
+    path('past/<int:past_id>/section', views.regenerate_section, name="regenerate_section"),
     path('delete_past/<Past_id>', views.delete_past, name="delete_past"),
     path('register/', views.register_user, name="register"),
     path('login/', views.login_user, name="login"),
     path('logout/', views.logout_user, name="logout"),
     path('edit-profile/', views.edit_profile, name="edit_profile"),
+    path('cache-stats/', views.cache_stats, name="cache_stats"),
+    path('metrics', views.metrics_view, name="metrics"),
 ]
\ No newline at end of file
@@ -1,23 +1,116 @@
+import hashlib
 import re
-from django.utils.html import escape
+import threading
+from collections import OrderedDict
+
 from django.utils.safestring import mark_safe
 
+# Bump whenever render_job_description output changes; Past rows rendered with an
+# older version are re-rendered on read and by `manage.py backfill_jd_html`.
+RENDERER_VERSION = 4
+
+_BOLD = re.compile(r"\*\*(.+?)\*\*")
+_HEADING = re.compile(r"#{1,6}[ \t]+(.*?)[ \t#]*$")
+_BULLET_MARKERS = ("-", "*", "•")
+
+# Only whole documents are worth caching; streamed fragments are short and unique
+RENDER_CACHE_SIZE = 512
+RENDER_CACHE_MIN_LENGTH = 200
+
+
+def _escape(text):
+    # Same entities as django.utils.html.escape, without its SafeString wrapping
+    return (
+        text.replace("&", "&amp;")
+        .replace("<", "&lt;")
+        .replace(">", "&gt;")
+        .replace('"', "&quot;")
+        .replace("'", "&#x27;")
+    )
+
+
+def _bold(match):
+    return f"<strong>{match.group(1).upper()}</strong>"
+
+
+def _render(text):
+    html = []
+    for line in _escape(text).split("\n"):
+        if not line or line.isspace():
+            # Every blank line is its own <br>, so a text rendered in chunks of
+            # whole lines gives the same HTML as the text rendered at once
+            html.append("")
+            continue
+
+        first = line[0]
+        # "-Item" is a bullet too, but "--" and "**bold**" are not
+        if first in _BULLET_MARKERS and line[1:2] != first:
+            line = "• " + line[1:].lstrip(" \t")
+        elif first == "#":
+            heading = _HEADING.match(line)
+            if heading:
+                text = heading.group(1).replace("**", "").upper()
+                html.append(f'<strong class="jd-heading">{text}</strong>')
+                continue
+        if "**" in line:
+            line = _BOLD.sub(_bold, line)
+        html.append(line)
+    return "<br>".join(html)
+
+
+class _RenderCache:
+    """
+    Bounded LRU of rendered HTML keyed by a hash of the text, so the keys stay
+    small however long the job descriptions are.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            html = self._entries.get(key)
+            if html is not None:
+                self._entries.move_to_end(key)
+            return html
+
+    def put(self, key, html):
+        with self._lock:
+            self._entries[key] = html
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+render_cache = _RenderCache(RENDER_CACHE_SIZE)
+
 
 def render_job_description(text: str) -> str:
     """
-    Convert stored JD markdown-like text into safe HTML with uppercase bold labels.
+    Convert stored JD markdown-like text into safe HTML.
+
+    The text is escaped and then walked once, line by line: "# Heading" lines
+    and **bold** spans become uppercase <strong> labels, lines starting with
+    "- ", "* " or "• " become "• " bullets, and lines are joined with <br>. Each
+    line renders on its own, so the streaming view can render a text in chunks
+    of whole lines.
+    Long texts are memoized in an LRU keyed by a hash of the text.
     """
     if not text:
         return ""
 
-    escaped = escape(text)
-
-    formatted = re.sub(
-        r"\*\*(.+?)\*\*",
-        lambda match: f"<strong>{match.group(1).upper()}</strong>",
-        escaped,
-    )
-    formatted = re.sub(r"(^|\n)-\s*", r"\1• ", formatted)
-    formatted = formatted.replace("\n", "<br>")
+    if len(text) < RENDER_CACHE_MIN_LENGTH:
+        return mark_safe(_render(text))
 
-    return mark_safe(formatted)
+    key = hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+    html = render_cache.get(key)
+    if html is None:
+        html = mark_safe(_render(text))
+        render_cache.put(key, html)
+    return html
@@ -1,58 +1,106 @@
-from django.shortcuts import render, redirect
+import hashlib
+import logging
+import time
+from contextlib import AsyncExitStack, ExitStack
+
+import openai
+from django.conf import settings
+from django.shortcuts import get_object_or_404, render, redirect
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.html import escape
+from django.utils.http import http_date, quote_etag
+from django.utils.safestring import mark_safe
+from django.template.defaultfilters import pluralize
+from django.utils.text import slugify
 from django.contrib import messages
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_POST
 from django.contrib.auth import authenticate, login, logout, update_session_auth_hash
 from django.contrib.auth.decorators import login_required
+from django.contrib.auth.views import redirect_to_login
 from django.contrib.auth.models import User
-from openai import OpenAI
-from .models import Past, UserProfile
+from django.core.handlers.asgi import ASGIRequest
+from django.utils.dateparse import parse_date
+from .models import Draft, GenerationBatch, GenerationJob, Past, UserProfile
 from .forms import ProfileUpdateForm, PasswordChangeWithSecurityForm
-from django.core.paginator import Paginator
-import os
-from .utils import render_job_description
-
-# Create OpenAI client once, using the env var loaded by manage.py
-API_KEY = os.getenv("OPENAI_API_KEY")
-if not API_KEY:
-    # Fail fast so you see a clear error in the server logs instead of a 401 later
-    raise RuntimeError("OPENAI_API_KEY is not set. Ensure .env is next to manage.py and is loaded.")
-client = OpenAI(api_key=API_KEY)
+import json
+from asgiref.sync import sync_to_async
+from .openai_client import get_async_client, get_client
+from .pagination import paginate_keyset
+from .search import get_search_backend
+from .utils import RENDERER_VERSION, render_job_description
+from . import batch as batches
+from . import (
+    drafts, export, history, jobs, metrics, ratelimit, resilience, response_cache, routing, sections,
+    similarity, singleflight,
+)
+from .generation import (
+    GENERATION_FAILED_MESSAGE,
+    GENERATION_PARAMS,
+    JD_FORM_FIELDS,
+    build_messages,
+    degraded_answer,
+    elapsed_ms,
+    fingerprint_for,
+    form_from_question,
+    generate_job_description,
+    generate_variants,
+    question_for_history,
+    usage_fields,
+    usage_tokens,
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+def read_jd_form(request):
+    """
+    Pull the generator form fields out of a POST, stripped of surrounding whitespace.
+    """
+    return {name: request.POST.get(name, "").strip() for name in JD_FORM_FIELDS}
 
 
-def build_jd_prompt(company_name, job_title, tech_skills, experience_level, location, optional_notes):
+def variant_count(request):
     """
-    Combine 5 required fields plus 1 optional free-text field into a clear prompt.
+    Number of variants asked for, between 1 and JD_MAX_VARIANTS.
     """
-    base_prompt = f"""
-You are an experienced technical recruiter and HR specialist.
-
-Based on the following information, write a complete job description in English.
+    try:
+        count = int(request.POST.get("variants") or 1)
+    except ValueError:
+        count = 1
+    return max(1, min(count, settings.JD_MAX_VARIANTS))
 
-- Company: {company_name}
-- Job Title: {job_title}
-- Tech Skills: {tech_skills}
-- Experience Level: {experience_level}
-- Location: {location}
-"""
 
-    if optional_notes:
-        base_prompt += f"- Extra notes from the user (optional): {optional_notes}\n"
+def remember_generation(request, form, past=None, draft_group=None):
+    """
+    Keep the form inputs and the id of the resulting Past (or of the drafts
+    waiting for a choice) in the session; the job description itself is loaded
+    from the database when the page is shown again.
+    """
+    saved = {**form, "past_id": past.pk if past else None}
+    if draft_group:
+        saved["draft_group"] = str(draft_group)
+    # Assigning marks the session modified, so skip the write when nothing changed
+    if request.session.get("last_generation") != saved:
+        request.session["last_generation"] = saved
 
-    base_prompt += """
-Requirements:
 
-* Start with the job title as a heading.
-* Then add a section "Responsibilities:" as bullet points.
-* Then a section "Requirements:" as bullet points.
-* Optionally add a "Nice to Have:" section if it makes sense.
-* End with a short paragraph about location / remote policy and company culture.
-* Length around 300 to 500 words.
-"""
-    return base_prompt
+def section_context(past):
+    """
+    Context for the "regenerate one section" form under a shown job description.
+    """
+    return {"section_past_id": past.pk, "sections": sections.editable(past.answer)}
 
 
-# Create Homepage
-@login_required(login_url='login')
-def home(request):
+def initial_home_context(request):
+    """
+    Empty form, or the inputs and result of the last generation in this session.
+    """
     default_context = {
         "company_name": "",
         "job_title": "",
@@ -62,136 +110,782 @@ def home(request):
         "company_tone": "",
         "job_description": "",
         "job_description_html": "",
+        "queue_mode": settings.JD_GENERATION_MODE == "queue",
+        "variant_choices": range(1, settings.JD_MAX_VARIANTS + 1),
     }
     saved_context = request.session.get("last_generation")
     context = default_context.copy()
 
     if saved_context:
         context.update(saved_context)
-        # Recompute HTML if only raw text was saved
-        if context.get("job_description") and not context.get("job_description_html"):
+        past_id = context.pop("past_id", None)
+        draft_group = context.pop("draft_group", None)
+        if draft_group:
+            context["variants"] = drafts.pending(request.user, draft_group)
+        if past_id:
+            past = (
+                Past.objects.filter(pk=past_id, user=request.user)
+                .only("answer", "answer_html", "html_version")
+                .first()
+            )
+            if past:
+                context["job_description"] = past.answer
+                context["job_description_html"] = past.html
+                context.update(section_context(past))
+        # Sessions written before past_id was stored carry the text itself
+        elif context.get("job_description") and not context.get("job_description_html"):
             context["job_description_html"] = render_job_description(
                 context["job_description"]
             )
 
+    return context
+
+
+def rate_limited(response, exc):
+    response.status_code = 429
+    response["Retry-After"] = str(exc.retry_after)
+    return response
+
+
+def unavailable_page(request, context, exc):
+    context.update(job_description=exc.message, job_description_html=escape(exc.message))
+    response = render(request, 'home.html', context, status=503)
+    response["Retry-After"] = str(exc.retry_after)
+    return response
+
+
+def rate_limited_page(request, context, exc):
+    context.update(job_description=exc.message, job_description_html=escape(exc.message))
+    return rate_limited(render(request, 'home.html', context), exc)
+
+
+def similar_suggestion(request, form, force_regenerate):
+    """
+    Context for the "you already generated something similar" prompt, or None
+    when the request should go ahead and generate.
+    """
+    if (
+        not settings.JD_SIMILARITY_SUGGESTIONS
+        or force_regenerate
+        or request.POST.get("skip_similar")
+    ):
+        return None
+
+    match = similarity.find_similar(request.user, question_for_history(form))
+    if match is None:
+        return None
+
+    similar_past, score = match
+    return {"similar_past": similar_past, "similar_score": round(score * 100)}
+
+
+def variants_page(request, context, form, count):
+    """
+    Generate `count` candidates in one OpenAI call and show them side by side;
+    nothing reaches the history until one of them is promoted.
+    """
+    try:
+        completions = generate_variants(form, count, user_id=request.user.pk)
+    except resilience.GenerationUnavailable as e:
+        return unavailable_page(request, context, e)
+    except openai.OpenAIError:
+        logger.exception("OpenAI rejected a generation request")
+        context["job_description"] = GENERATION_FAILED_MESSAGE
+        context["job_description_html"] = GENERATION_FAILED_MESSAGE
+        return render(request, 'home.html', context)
+
+    group, context["variants"] = drafts.save_variants(
+        request.user, question_for_history(form), completions
+    )
+    remember_generation(request, form, draft_group=group)
+    return render(request, 'home.html', context)
+
+
+def reuse_past(request, context, past_id):
+    """
+    Show an earlier generation again instead of calling the model.
+    """
+    past = get_object_or_404(Past, pk=past_id, user=request.user)
+    form = form_from_question(past.question)
+    context.update(form, job_description=past.answer, job_description_html=past.html)
+    context.update(section_context(past))
+    remember_generation(request, form, past)
+
+
+# Create Homepage
+@login_required(login_url='login')
+def home(request):
+    context = initial_home_context(request)
+
+    # A malformed id (e.g. a mangled link) is ignored like a missing one
+    if request.method == "GET" and request.GET.get("reuse", "").isdigit():
+        reuse_past(request, context, request.GET["reuse"])
+
     if request.method == "POST":
-        company_name = request.POST.get("company_name", "").strip()
-        job_title = request.POST.get("job_title", "").strip()
-        tech_skills = request.POST.get("tech_skills", "").strip()
-        experience_level = request.POST.get("experience_level", "").strip()
-        location = request.POST.get("location", "").strip()
-        optional_notes = request.POST.get("company_tone", "").strip()
+        form = read_jd_form(request)
+        context.update(form)
+        force_regenerate = request.POST.get("force_regenerate") == "on"
 
-        company_tone = optional_notes
-        job_description = ""
+        try:
+            ratelimit.enforce(request.user)
+        except ratelimit.RateLimitExceeded as e:
+            return rate_limited_page(request, context, e)
+
+        suggestion = similar_suggestion(request, form, force_regenerate)
+        if suggestion:
+            context.update(suggestion, job_description="", job_description_html="")
+            return render(request, 'home.html', context)
+
+        if settings.JD_GENERATION_MODE == "queue":
+            # Hand the generation to jd_worker and return right away
+            job = jobs.enqueue(request.user, form, force_regenerate)
+            request.session["last_generation"] = {**form, "job_id": job.pk}
+
+            if request.headers.get("Accept") == "application/json":
+                return JsonResponse(
+                    {"job_id": job.pk, "status_url": reverse("job_status", args=[job.pk])},
+                    status=202,
+                )
 
-        context.update(
-            {
-                "company_name": company_name,
-                "job_title": job_title,
-                "tech_skills": tech_skills,
-                "experience_level": experience_level,
-                "location": location,
-                "company_tone": optional_notes,
-            }
-        )
+            context.update(job_id=job.pk, job_description="", job_description_html="")
+            return render(request, 'home.html', context)
 
-        user_prompt = build_jd_prompt(
-            company_name,
-            job_title,
-            tech_skills,
-            experience_level,
-            location,
-            optional_notes,
-        )
+        count = variant_count(request)
+        if count > 1:
+            context.update(job_description="", job_description_html="", variants=[])
+            return variants_page(request, context, form, count)
 
+        past = None
         try:
-            # call OpenAI
-            response = client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You write polished, professional job descriptions.",
-                    },
-                    {"role": "user", "content": user_prompt},
-                ],
-                temperature=0.7,
-                max_tokens=700,
-                top_p=1.0,
-                frequency_penalty=0.0,
-                presence_penalty=0.0,
+            job_description, cache_hit, completion = generate_job_description(
+                form, force_regenerate, user_id=request.user.pk
             )
+            context["cache_hit"] = cache_hit
 
-            job_description = response.choices[0].message.content.strip()
+            past = Past.objects.create(
+                question=question_for_history(form),
+                answer=job_description,
+                user=request.user,
+                **(completion.past_fields() if completion else {}),
+            )
 
-            if not job_description:
-                job_description = "No response received from the model."
+            context["job_description"] = job_description
+            context["job_description_html"] = past.answer_html
+            context.update(section_context(past))
+
+        except resilience.GenerationUnavailable as e:
+            return unavailable_page(request, context, e)
+
+        except openai.OpenAIError:
+            logger.exception("OpenAI rejected a generation request")
+            context["job_description"] = GENERATION_FAILED_MESSAGE
+            context["job_description_html"] = GENERATION_FAILED_MESSAGE
+
+        remember_generation(request, form, past)
+
+    return render(request, 'home.html', context)
+
+
+async def home_async(request):
+    """
+    Async variant of home() for ASGI deployments (JD_ASYNC_VIEWS=True).
+
+    The OpenAI round trip and the Past insert are awaited so a worker is free to
+    serve other requests meanwhile; session and template work stays in the sync
+    thread pool.
+    """
+    # login_required does not wrap coroutines on Django 4.2
+    is_authenticated = await sync_to_async(lambda: request.user.is_authenticated)()
+    if not is_authenticated:
+        return redirect_to_login(request.get_full_path(), 'login')
+
+    # Variants are generated by the sync view; they are a deliberate, rarer choice.
+    # In queue mode a POST only stores a job, which the sync view does as well.
+    if (
+        request.method != "POST"
+        or variant_count(request) > 1
+        or settings.JD_GENERATION_MODE == "queue"
+    ):
+        return await sync_to_async(home)(request)
+
+    context = await sync_to_async(initial_home_context)(request)
+    form = read_jd_form(request)
+    context.update(form)
+    job_description = ""
+    past = None
+
+    force_regenerate = request.POST.get("force_regenerate") == "on"
 
-            lines = [
-                f"Company: {company_name}",
-                f"Job Title: {job_title}",
-                f"Tech Skills: {tech_skills}",
-                f"Experience Level: {experience_level}",
-                f"Location: {location}",
-            ]
+    try:
+        await sync_to_async(ratelimit.enforce)(request.user)
+    except ratelimit.RateLimitExceeded as e:
+        return await sync_to_async(rate_limited_page)(request, context, e)
+
+    suggestion = await sync_to_async(similar_suggestion)(request, form, force_regenerate)
+    if suggestion:
+        context.update(suggestion, job_description="", job_description_html="")
+        return await sync_to_async(render)(request, 'home.html', context)
+    route = await sync_to_async(routing.choose)(form, GENERATION_PARAMS)
+    fingerprint = fingerprint_for(form, route)
+
+    try:
+        cached_answer = None
+        if not force_regenerate:
+            cached_answer = await sync_to_async(response_cache.lookup)(fingerprint)
+
+        usage = {}
+        async with AsyncExitStack() as in_flight:
+            if cached_answer is None:
+                # Wait for an identical generation already running in any worker
+                cached_answer = await in_flight.enter_async_context(singleflight.aflight(fingerprint))
+
+            if cached_answer is not None:
+                job_description = cached_answer
+                context["cache_hit"] = True
+            else:
+                started = time.monotonic()
+                try:
+                    response = await resilience.acall(
+                        lambda timeout: get_async_client().chat.completions.create(
+                            messages=build_messages(form),
+                            timeout=timeout,
+                            **route.params,
+                        ),
+                        route.model,
+                    )
+                except resilience.GenerationUnavailable:
+                    job_description = await sync_to_async(degraded_answer)(
+                        fingerprint, form, request.user.pk
+                    )
+                    if job_description is None:
+                        raise
+                    context["cache_hit"] = True
+                else:
+                    prompt_tokens, completion_tokens = usage_tokens(response.usage)
+                    metrics.record_tokens(route.model, prompt_tokens, completion_tokens)
+                    await sync_to_async(ratelimit.charge_tokens)(
+                        request.user.pk, prompt_tokens + completion_tokens
+                    )
+                    usage = usage_fields(
+                        route, prompt_tokens, completion_tokens, elapsed_ms(started),
+                        response.choices[0].finish_reason == "length",
+                    )
+
+                    job_description = response.choices[0].message.content.strip()
+                    if job_description:
+                        await sync_to_async(response_cache.store)(fingerprint, job_description)
+
+        if not job_description:
+            job_description = "No response received from the model."
+
+        past = await Past.objects.acreate(
+            question=question_for_history(form),
+            answer=job_description,
+            user=request.user,
+            **usage,
+        )
 
-            if optional_notes:
-                lines.append(f"Optional: {optional_notes}")
+        context["job_description"] = job_description
+        context["job_description_html"] = past.answer_html
+        context.update(section_context(past))
 
-            question_for_history = "\n".join(lines)
+    except resilience.GenerationUnavailable as e:
+        return await sync_to_async(unavailable_page)(request, context, e)
 
-            Past.objects.create(
-                question=question_for_history,
+    except openai.OpenAIError:
+        logger.exception("OpenAI rejected a generation request")
+        context["job_description"] = GENERATION_FAILED_MESSAGE
+        context["job_description_html"] = GENERATION_FAILED_MESSAGE
+
+    await sync_to_async(remember_generation)(request, form, past)
+
+    return await sync_to_async(render)(request, 'home.html', context)
+
+
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def aiterate(iterator):
+    """
+    Drive a sync generator from an async one, one item per hop to the sync
+    thread. Under ASGI, Django would otherwise collect a sync iterator with
+    list() before sending anything, which buffers the whole stream.
+    """
+    done = object()
+    try:
+        while True:
+            item = await sync_to_async(next)(iterator, done)
+            if item is done:
+                return
+            yield item
+    finally:
+        # Runs the generator's cleanup (e.g. the single-flight release) when
+        # the client goes away mid-stream
+        await sync_to_async(iterator.close)()
+
+
+@login_required(login_url='login')
+@require_POST
+def generate_stream(request):
+    """
+    Stream the job description to the browser over Server-Sent Events.
+
+    Complete lines are rendered once and sent as "append" HTML; the unfinished
+    last line is re-rendered on every token as "tail" HTML. The finished text is
+    saved to Past and the session when the upstream stream closes.
+    """
+    try:
+        ratelimit.enforce(request.user)
+    except ratelimit.RateLimitExceeded as e:
+        return rate_limited(JsonResponse({"message": e.message}), e)
+
+    form = read_jd_form(request)
+    force_regenerate = request.POST.get("force_regenerate") == "on"
+    suggestion = similar_suggestion(request, form, force_regenerate)
+    if suggestion:
+        html = render_to_string('similar_suggestion.html', suggestion, request=request)
+        return StreamingHttpResponse(
+            [sse_event("similar", {"html": html})], content_type="text/event-stream"
+        )
+
+    route = routing.choose(form, GENERATION_PARAMS)
+    fingerprint = fingerprint_for(form, route)
+
+    def event_stream():
+        try:
+            cached_answer = None if force_regenerate else response_cache.lookup(fingerprint)
+
+            with ExitStack() as in_flight:
+                usage = {}
+                if cached_answer is None:
+                    # Wait for an identical generation already running in any worker
+                    cached_answer = in_flight.enter_context(singleflight.flight(fingerprint))
+
+                if cached_answer is None:
+                    started = time.monotonic()
+                    try:
+                        stream = resilience.call(
+                            lambda timeout: get_client().chat.completions.create(
+                                messages=build_messages(form),
+                                stream=True,
+                                # The last chunk then carries usage for the token budget
+                                stream_options={"include_usage": True},
+                                timeout=timeout,
+                                **route.params,
+                            ),
+                            route.model,
+                            operation="chat_stream",
+                            # A hedged stream would bill twice for every slow start
+                            hedge=False,
+                        )
+                    except resilience.GenerationUnavailable:
+                        cached_answer = degraded_answer(fingerprint, form, request.user.pk)
+                        if cached_answer is None:
+                            raise
+
+                if cached_answer is not None:
+                    job_description = cached_answer
+                else:
+                    received = ""
+                    rendered_upto = 0
+                    stream_usage = None
+                    finish_reason = None
+                    for chunk in stream:
+                        if getattr(chunk, "usage", None):
+                            stream_usage = chunk.usage
+                        if not chunk.choices:
+                            continue
+                        finish_reason = chunk.choices[0].finish_reason or finish_reason
+                        delta = chunk.choices[0].delta.content
+                        if not delta:
+                            continue
+
+                        received += delta
+                        line_end = received.rfind("\n") + 1
+                        append_html = ""
+                        if line_end > rendered_upto:
+                            append_html = render_job_description(received[rendered_upto:line_end])
+                            rendered_upto = line_end
+                        yield sse_event(
+                            "delta",
+                            {
+                                "append": append_html,
+                                "tail": render_job_description(received[rendered_upto:]),
+                            },
+                        )
+
+                    prompt_tokens, completion_tokens = usage_tokens(stream_usage)
+                    metrics.record_tokens(route.model, prompt_tokens, completion_tokens)
+                    ratelimit.charge_tokens(request.user.pk, prompt_tokens + completion_tokens)
+                    usage = usage_fields(
+                        route, prompt_tokens, completion_tokens, elapsed_ms(started),
+                        finish_reason == "length",
+                    )
+                    job_description = received.strip()
+                    if job_description:
+                        response_cache.store(fingerprint, job_description)
+
+            if not job_description:
+                job_description = "No response received from the model."
+
+            past = Past.objects.create(
+                question=question_for_history(form),
                 answer=job_description,
                 user=request.user,
+                **usage,
             )
+            job_description_html = past.answer_html
 
-            context["job_description"] = job_description
-            context["job_description_html"] = render_job_description(job_description)
-
-        except Exception as e:
-            context["job_description"] = f"Error generating job description: {e}"
-            context["job_description_html"] = context["job_description"]
-
-        request.session["last_generation"] = {
-            "company_name": company_name,
-            "job_title": job_title,
-            "tech_skills": tech_skills,
-            "experience_level": experience_level,
-            "location": location,
-            "company_tone": company_tone,
-            "job_description": context.get("job_description", ""),
-            "job_description_html": context.get("job_description_html", ""),
-        }
+            # SessionMiddleware has already run by the time the body streams
+            remember_generation(request, form, past)
+            if request.session.modified:
+                request.session.save()
 
-    return render(request, 'home.html', context)
+            sections_html = render_to_string(
+                'section_form.html', section_context(past), request=request
+            )
+            yield sse_event(
+                "done",
+                {
+                    "html": job_description_html,
+                    "cache_hit": cached_answer is not None,
+                    "sections_html": sections_html,
+                },
+            )
+
+        except resilience.GenerationUnavailable as e:
+            yield sse_event("error", {"message": e.message})
+
+        except openai.OpenAIError:
+            logger.exception("OpenAI rejected a generation request")
+            yield sse_event("error", {"message": GENERATION_FAILED_MESSAGE})
+
+    events = event_stream()
+    response = StreamingHttpResponse(
+        aiterate(events) if isinstance(request, ASGIRequest) else events,
+        content_type="text/event-stream",
+    )
+    response["Cache-Control"] = "no-cache"
+    # Stop nginx-style proxies from buffering the stream
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+@login_required(login_url='login')
+@require_POST
+def promote_draft(request, draft_id):
+    """
+    Keep one of the variants: it becomes a Past row and the shown result.
+    """
+    draft = get_object_or_404(Draft, pk=draft_id, user=request.user)
+    try:
+        past = drafts.promote(draft)
+    except drafts.DraftError as e:
+        messages.error(request, str(e))
+        return redirect('home')
+    remember_generation(request, form_from_question(draft.question), past)
+    return redirect('home')
+
+
+@login_required(login_url='login')
+@require_POST
+def regenerate_section(request, past_id):
+    """
+    Regenerate one section of a job description and show the result, which is
+    saved as a new Past row next to the original.
+    """
+    past = get_object_or_404(Past, pk=past_id, user=request.user)
+    context = initial_home_context(request)
+
+    try:
+        ratelimit.enforce(request.user)
+    except ratelimit.RateLimitExceeded as e:
+        return rate_limited_page(request, context, e)
+
+    try:
+        revision = sections.regenerate(
+            past,
+            request.POST.get("section", ""),
+            request.POST.get("instructions", "")[:300],
+            user_id=request.user.pk,
+        )
+    except resilience.GenerationUnavailable as e:
+        return unavailable_page(request, context, e)
+    except sections.SectionError as e:
+        messages.error(request, str(e))
+        return redirect('home')
+    except openai.OpenAIError:
+        logger.exception("OpenAI rejected a section regeneration")
+        messages.error(request, GENERATION_FAILED_MESSAGE)
+        return redirect('home')
+
+    remember_generation(request, form_from_question(past.question), revision)
+    return redirect('home')
+
+
+@login_required(login_url='login')
+def job_status(request, job_id):
+    """
+    Poll a queued generation; a finished job also becomes the session's last result.
+    """
+    job = get_object_or_404(
+        GenerationJob.objects.select_related("past"), pk=job_id, user=request.user
+    )
+    data = {"id": job.pk, "status": job.status}
+
+    if job.status == GenerationJob.DONE:
+        if job.past:
+            job_description_html = job.past.html
+        else:
+            job_description_html = render_job_description(job.result)
+        data.update(job_description=job.result, html=job_description_html)
+
+        saved = request.session.get("last_generation") or {}
+        if saved.get("job_id") == job.pk:
+            remember_generation(request, job.form, job.past)
+    elif job.status == GenerationJob.FAILED:
+        data["error"] = job.error
+
+    return JsonResponse(data)
+
+
+@login_required(login_url='login')
+def batch_list(request):
+    if request.method == "POST":
+        uploaded_file = request.FILES.get("batch_file")
+        if not uploaded_file:
+            messages.error(request, "Please choose a CSV or JSONL file.")
+            return redirect('batch_list')
+
+        try:
+            ratelimit.enforce(request.user)
+        except ratelimit.RateLimitExceeded as e:
+            messages.error(request, e.message)
+            return rate_limited(redirect('batch_list'), e)
+
+        try:
+            forms = batches.parse_batch_file(uploaded_file)
+        except batches.BatchFileError as e:
+            messages.error(request, str(e))
+            return redirect('batch_list')
+
+        batch = batches.create_batch(request.user, uploaded_file.name, forms)
+        messages.success(request, f"Batch with {batch.total} job descriptions queued.")
+        return redirect('batch_detail', batch_id=batch.pk)
+
+    user_batches = GenerationBatch.objects.filter(user=request.user)[:20]
+    return render(request, 'batch.html', {"batches": user_batches})
+
+
+@login_required(login_url='login')
+def batch_detail(request, batch_id):
+    batch = get_object_or_404(GenerationBatch, pk=batch_id, user=request.user)
+
+    if request.GET.get("format") == "json":
+        return JsonResponse(
+            {
+                "id": batch.pk,
+                "status": batch.status,
+                "total": batch.total,
+                "completed": batch.completed,
+                "failed": batch.failed,
+                "skipped": batch.skipped,
+                "progress": batch.progress,
+            }
+        )
+
+    return render(request, 'batch_detail.html', {"batch": batch})
+
+
+@login_required(login_url='login')
+def batch_download(request, batch_id):
+    batch = get_object_or_404(GenerationBatch, pk=batch_id, user=request.user)
+    stem = slugify(batch.name.rsplit(".", 1)[0]) or f"batch-{batch.pk}"
+
+    if request.GET.get("format") == "zip":
+        response = HttpResponse(batches.export_zip(batch), content_type="application/zip")
+        response["Content-Disposition"] = f'attachment; filename="{stem}.zip"'
+    else:
+        response = HttpResponse(
+            "".join(batches.export_jsonl(batch)), content_type="application/x-ndjson"
+        )
+        response["Content-Disposition"] = f'attachment; filename="{stem}.jsonl"'
+    return response
+
+
+def metrics_view(request):
+    """
+    Prometheus scrape endpoint; requires "Authorization: Bearer <JD_METRICS_TOKEN>"
+    when that setting is configured.
+    """
+    token = getattr(settings, "JD_METRICS_TOKEN", None)
+    if token and request.headers.get("Authorization") != f"Bearer {token}":
+        return HttpResponse(status=401)
+
+    body, content_type = metrics.render_latest()
+    return HttpResponse(body, content_type=content_type)
+
+
+@staff_member_required
+def cache_stats(request):
+    return JsonResponse(response_cache.stats())
+
+
+def page_cache_version():
+    """
+    Part of the history cache key and ETag that changes when the markup does:
+    the renderer version plus settings.JD_PAGE_CACHE_VERSION for templates.
+    """
+    return f"{RENDERER_VERSION}.{getattr(settings, 'JD_PAGE_CACHE_VERSION', '1')}"
+
+
+def history_list(request, stamp):
+    """
+    The rendered cards and pager for one history page, cached per user, page
+    and history stamp; any change to the history gives a new stamp.
+    """
+    key = "jd:history:{}:{}:{}:{}".format(
+        request.user.pk,
+        stamp,
+        page_cache_version(),
+        hashlib.blake2b(request.GET.urlencode().encode(), digest_size=8).hexdigest(),
+    )
+    html = cache.get(key)
+    if html is None:
+        # Keyset pagination over the current user's records only; the raw answer
+        # is not needed because the list shows the stored HTML
+        pages = paginate_keyset(
+            Past.objects.filter(user=request.user).defer("answer"),
+            after=request.GET.get('after'),
+            before=request.GET.get('before'),
+            last='last' in request.GET,
+            per_page=5,
+        )
+        html = render_to_string('past_list.html', {"pages": pages}, request=request)
+        cache.set(key, html, getattr(settings, "JD_HISTORY_CACHE_TIMEOUT", 3600))
+    return mark_safe(html)
 
 
 @login_required(login_url='login')
 def past(request):
-    # Set up pagination for current user's records only
-    p = Paginator(Past.objects.filter(user=request.user), 5)
-    page = request.GET.get('page')
-    pages = p.get_page(page)
+    version, changed_at = history.current_version(request.user.pk)
+    # The timestamp keeps stamps unique even if versions restart, e.g. after a restore
+    stamp = f"{version}.{changed_at.timestamp() if changed_at else 0}"
+    # The page embeds a CSRF token, so a new CSRF cookie must change the ETag
+    csrf_cookie = request.COOKIES.get(settings.CSRF_COOKIE_NAME, "")
+    etag = hashlib.blake2b(
+        f"{request.user.pk}:{stamp}:{page_cache_version()}:{csrf_cookie}".encode(), digest_size=12
+    ).hexdigest()
+    last_modified = int(changed_at.timestamp()) if changed_at else None
+
+    # Pending flash messages are shown on this page, so it has to be sent again
+    if not len(messages.get_messages(request)):
+        not_modified = get_conditional_response(request, etag=quote_etag(etag), last_modified=last_modified)
+        if not_modified is not None:
+            return not_modified
+
+    response = render(request, 'past.html', {"history_list": history_list(request, stamp)})
+    response["ETag"] = quote_etag(etag)
+    if last_modified:
+        response["Last-Modified"] = http_date(last_modified)
+    # Browsers may keep the page but must check back every time
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
 
-    # Queried The Database - only current user's records
-    past = Past.objects.filter(user=request.user)
+@login_required(login_url='login')
+def search_past(request):
+    query = request.GET.get('q', '').strip()
+    results = get_search_backend().search(request.user, query) if query else []
+    return render(request, 'search.html', {"query": query, "results": results})
 
-    # Get number of pages
-    nums = "a" * pages.paginator.num_pages
 
-    return render(request, 'past.html', {"past": past, "pages": pages, "nums": nums})
+def date_range(params):
+    """
+    The optional "from" and "to" dates (YYYY-MM-DD) in a query dict; raises
+    ValueError naming the parameter when one is malformed.
+    """
+    dates = []
+    for param in ("from", "to"):
+        value = params.get(param, "").strip()
+        try:
+            parsed = parse_date(value) if value else None
+        except ValueError:
+            parsed = None
+        if value and parsed is None:
+            raise ValueError(f"Invalid '{param}' date, expected YYYY-MM-DD.")
+        dates.append(parsed)
+    return dates
 
 
 @login_required(login_url='login')
+def export_past(request):
+    """
+    Download the user's history as ?format=csv|jsonl|zip, optionally limited to
+    ?from=YYYY-MM-DD and/or ?to=YYYY-MM-DD. The file is streamed row by row.
+    """
+    fmt = request.GET.get("format", "csv")
+    if fmt not in export.EXPORTERS:
+        return HttpResponse("Unknown export format.", status=400)
+
+    try:
+        start, end = date_range(request.GET)
+    except ValueError as exc:
+        return HttpResponse(str(exc), status=400)
+
+    exporter = export.EXPORTERS[fmt]()
+    rows = export.history_queryset(request.user, start, end)
+    # Under ASGI a sync iterator would be read to the end before sending
+    content = (
+        export.astream(exporter, rows)
+        if isinstance(request, ASGIRequest)
+        else export.stream(exporter, rows)
+    )
+
+    response = StreamingHttpResponse(content, content_type=exporter.content_type)
+    response["Content-Disposition"] = (
+        f'attachment; filename="job-descriptions.{exporter.extension}"'
+    )
+    return response
+
+
+@login_required(login_url='login')
+@require_POST
 def delete_past(request, Past_id):
-    past = Past.objects.get(pk=Past_id)
+    past = get_object_or_404(Past, pk=Past_id, user=request.user)
     past.delete()
     messages.success(request, ("That Question and Answer have been deleted..."))
     return redirect('past')
 
 
+@login_required(login_url='login')
+@require_POST
+def bulk_delete_past(request):
+    """
+    Delete the user's rows picked by checkbox ("ids") or by date range
+    ("from"/"to") with one set-based delete.
+    """
+    ids = [value for value in request.POST.getlist("ids") if value.isdigit()]
+    try:
+        start, end = date_range(request.POST)
+    except ValueError as exc:
+        messages.error(request, str(exc))
+        return redirect('past')
+
+    if ids:
+        rows = Past.objects.filter(user=request.user, pk__in=ids)
+    elif start or end:
+        rows = history.in_date_range(Past.objects.filter(user=request.user), start, end)
+    else:
+        messages.error(request, "Select some job descriptions or a date range to delete.")
+        return redirect('past')
+
+    deleted = history.delete_rows(rows)
+    messages.success(request, f"Deleted {deleted} job description{pluralize(deleted)}.")
+    return redirect('past')
+
+
 # User Registration View
 def register_user(request):
     if request.method == "POST":
@@ -0,0 +1,26 @@
+"""
+Gunicorn hooks for prometheus_client's multiprocess mode.
+
+Imported by gunicorn.conf.py and gunicorn_asgi.conf.py. The directory has to be
+in the environment before the workers import prometheus_client, and it is
+emptied when the master starts so samples from an earlier run are dropped.
+"""
+import os
+import shutil
+import tempfile
+
+os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), "jd_prometheus")
+)
+
+
+def on_starting(server):
+    path = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path, exist_ok=True)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,8 @@
+"""
+Gunicorn config for the WSGI deployment in Procfile.
+
+Gunicorn loads ./gunicorn.conf.py automatically, so the Procfile command needs
+no extra flags. The only setting here is the metrics hook set that lets /metrics
+aggregate samples from every worker process.
+"""
+from chatgpt.gunicorn_metrics import child_exit, on_starting  # noqa: F401
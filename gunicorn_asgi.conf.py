@@ -0,0 +1,33 @@
+"""
+Gunicorn config for serving chatgpt.asgi:application with Uvicorn workers.
+
+Each worker runs one event loop, so a generation waiting on OpenAI no longer
+blocks the process; a single worker can hold hundreds of requests in flight.
+
+Usage (see Procfile.asgi):
+
+    gunicorn chatgpt.asgi:application -c gunicorn_asgi.conf.py
+
+The WSGI deployment in Procfile keeps working unchanged.
+"""
+import multiprocessing
+import os
+
+# Share /metrics samples across workers
+from chatgpt.gunicorn_metrics import child_exit, on_starting  # noqa: F401
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+
+# One event loop per worker; a couple of workers is enough to use spare cores.
+worker_class = "uvicorn_worker.UvicornWorker"
+workers = int(os.getenv("WEB_CONCURRENCY", min(multiprocessing.cpu_count(), 4)))
+
+# A slow generation is still one request; keep the timeout above the OpenAI latency.
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 120))
+graceful_timeout = 30
+keepalive = 5
+
+# Route the generator page to chatbot.views.home_async
+raw_env = ["JD_ASYNC_VIEWS=True"]
+
+accesslog = "-"